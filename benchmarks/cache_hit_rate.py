@@ -0,0 +1,126 @@
+"""
+Доля попаданий в кэш фрагментов лент при нескольких воркерах.
+
+Каждый воркер запускается отдельным процессом со своим экземпляром кэша,
+как у gunicorn. С LocMemCache каждый процесс прогревает кэш заново,
+с общим бэкендом фрагмент, построенный одним воркером, читают все.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.cache_hit_rate --workers 4 --requests 200
+"""
+import argparse
+import multiprocessing
+import random
+import shutil
+import tempfile
+
+from benchmarks.utils import (
+    migrate, remove_database, setup_django, temp_database,
+)
+
+FRAGMENT_PREFIX = 'template.cache.'
+
+
+def cache_config(backend, location):
+    backends = {
+        'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+        'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    }
+    return {
+        'default': {
+            'BACKEND': backends[backend],
+            'LOCATION': location,
+            'KEY_PREFIX': 'bench',
+        }
+    }
+
+
+def count_fragment_lookups(stats):
+    """Подменяет get у кэша процесса, считая попадания во фрагменты."""
+    from django.core.cache import cache
+
+    original_get = cache.get
+
+    def get(key, *args, **kwargs):
+        value = original_get(key, *args, **kwargs)
+        if key.startswith(FRAGMENT_PREFIX):
+            stats['hits' if value is not None else 'misses'] += 1
+        return value
+
+    cache.get = get
+
+
+def worker(args):
+    database, caches, pages, requests, seed = args
+    setup_django(database=database, caches=caches)
+    from django.test import Client
+
+    stats = {'hits': 0, 'misses': 0}
+    count_fragment_lookups(stats)
+    client = Client()
+    rng = random.Random(seed)
+    for _ in range(requests):
+        client.get(f'/?page={rng.randint(1, pages)}')
+    return stats
+
+
+def seed_posts(total):
+    from posts.models import Group, Post, User
+
+    author = User.objects.create_user(username='bench_author')
+    group = Group.objects.create(
+        title='Бенчмарк', slug='bench', description='Бенчмарк'
+    )
+    Post.objects.bulk_create(
+        Post(text=f'Пост {i}', author=author, group=group)
+        for i in range(total)
+    )
+
+
+def run(backend, database, workers, requests, pages):
+    location = tempfile.mkdtemp(prefix='yatube_bench_cache_')
+    caches = cache_config(backend, location)
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(workers) as pool:
+        results = pool.map(
+            worker,
+            [
+                (database, caches, pages, requests, seed)
+                for seed in range(workers)
+            ],
+        )
+    shutil.rmtree(location, ignore_errors=True)
+    hits = sum(result['hits'] for result in results)
+    misses = sum(result['misses'] for result in results)
+    return hits, misses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=200,
+                        help='Запросов на одного воркера')
+    parser.add_argument('--pages', type=int, default=5,
+                        help='Сколько разных страниц главной запрашивать')
+    args = parser.parse_args()
+
+    database = temp_database()
+    setup_django(database=database, caches=cache_config('locmem', 'seed'))
+    migrate()
+    from posts.utils import COUNT_PAGES
+
+    seed_posts(COUNT_PAGES * args.pages)
+
+    print(f'{"backend":<8} {"hits":>6} {"misses":>6} {"hit rate":>9}')
+    for backend in ('locmem', 'file'):
+        hits, misses = run(
+            backend, database, args.workers, args.requests, args.pages
+        )
+        rate = hits / (hits + misses) if hits + misses else 0
+        print(f'{backend:<8} {hits:>6} {misses:>6} {rate:>9.1%}')
+    remove_database(database)
+
+
+if __name__ == '__main__':
+    main()
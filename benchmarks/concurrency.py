@@ -0,0 +1,164 @@
+"""
+Одновременные запросы к лентам при медленном вводе-выводе.
+
+Проект обслуживается через WSGI, и каждый запрос занимает рабочий
+поток до конца, пока ждёт базу. Скрипт поднимает настоящий HTTP-сервер
+Django в отдельном процессе и сравнивает синхронный воркер, который
+обрабатывает запросы по одному, с воркером, у которого на каждый
+запрос свой поток (как у gunicorn --threads). Медленная база
+имитируется задержкой --latency перед каждым SQL-запросом, клиенты
+(--clients) читают ленты, профили и страницы постов одновременно.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.concurrency --clients 16 --latency 20
+"""
+import argparse
+import http.client
+import multiprocessing
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from benchmarks.db_connections import cache_config, feed_paths
+from benchmarks.utils import (
+    migrate, percentile, remove_database, setup_django, temp_database,
+)
+
+# Название: обрабатывает ли сервер каждый запрос в своём потоке
+CONFIGURATIONS = {
+    'sync': False,
+    'threaded': True,
+}
+POST_PAGES: int = 10  # Сколько разных страниц постов читают клиенты
+
+
+def serve(database, threaded, latency, ports):
+    setup_django(database=database, caches=cache_config())
+    from django.conf import settings
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.core.servers.basehttp import (
+        ThreadedWSGIServer, WSGIRequestHandler, WSGIServer,
+    )
+    from django.db import connections
+
+    settings.DEBUG = False
+    handler = WSGIHandler()
+
+    def slow_io(execute, sql, params, many, context):
+        time.sleep(latency / 1000)
+        return execute(sql, params, many, context)
+
+    def application(environ, start_response):
+        # Задержка добавляется к каждому запросу к базе на время запроса
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(slow_io))
+            return handler(environ, start_response)
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    base = ThreadedWSGIServer if threaded else WSGIServer
+
+    class Server(base):
+        # Очередь соединений вмещает всех клиентов даже у синхронного
+        request_queue_size = 128
+
+    server = Server(('127.0.0.1', 0), QuietHandler)
+    server.set_app(application)
+    ports.put(server.server_address[1])
+    server.serve_forever()
+
+
+def load(port, paths, clients, seconds):
+    """Гоняет запросы из clients потоков; возвращает задержки в мс."""
+    deadline = time.monotonic() + seconds
+    timings = [[] for _ in range(clients)]
+
+    def run(number):
+        rng = random.Random(number)
+        while time.monotonic() < deadline:
+            connection = http.client.HTTPConnection('127.0.0.1', port)
+            started = time.perf_counter()
+            connection.request('GET', rng.choice(paths))
+            response = connection.getresponse()
+            response.read()
+            timings[number].append((time.perf_counter() - started) * 1000)
+            connection.close()
+            if response.status >= 400:
+                raise RuntimeError(f'{response.status}')
+
+    pool = [
+        threading.Thread(target=run, args=(number,))
+        for number in range(clients)
+    ]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return [timing for client in timings for timing in client]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument(
+        '--latency',
+        type=float,
+        default=20,
+        help='Задержка перед каждым SQL-запросом, мс',
+    )
+    parser.add_argument('--posts', type=int, default=5000)
+    args = parser.parse_args()
+
+    database = temp_database()
+    setup_django(database=database, caches=cache_config())
+    migrate()
+    from posts.models import Post
+    from posts.seeding import seed_database
+
+    seed_database(
+        users=200, groups=10, posts=args.posts, comments=args.posts,
+        follows=10, image_ratio=0,
+    )
+    paths = feed_paths() + [
+        f'/posts/{pk}/'
+        for pk in Post.objects.values_list('pk', flat=True)[:POST_PAGES]
+    ]
+    from django.db import connections
+
+    connections.close_all()
+
+    context = multiprocessing.get_context('spawn')
+    print(f'{"configuration":<12} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8}')
+    try:
+        for name, threaded in CONFIGURATIONS.items():
+            ports = context.Queue()
+            server = context.Process(
+                target=serve,
+                args=(database, threaded, args.latency, ports),
+                daemon=True,
+            )
+            server.start()
+            try:
+                timings = load(
+                    ports.get(timeout=60), paths, args.clients, args.seconds
+                )
+            finally:
+                server.terminate()
+                server.join()
+            print(
+                f'{name:<12} {len(timings) / args.seconds:>8.1f} '
+                f'{percentile(timings, 50):>8.1f} '
+                f'{percentile(timings, 95):>8.1f}'
+            )
+    finally:
+        remove_database(database)
+
+
+if __name__ == '__main__':
+    main()
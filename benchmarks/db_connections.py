@@ -0,0 +1,134 @@
+"""
+Пропускная способность лент при разных настройках соединений с базой.
+
+Каждая конфигурация запускается в отдельном процессе: несколько потоков,
+как у gunicorn --threads, гоняют запросы к лентам через WSGIHandler.
+В отличие от тестового клиента он, как настоящий сервер, закрывает
+соединения по окончании запроса, если CONN_MAX_AGE = 0.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.db_connections --threads 4 --seconds 10
+"""
+import argparse
+import io
+import multiprocessing
+import random
+import threading
+import time
+
+from benchmarks.utils import (
+    migrate, remove_database, setup_django, temp_database,
+)
+
+# Название: (CONN_MAX_AGE, применять ли SQLITE_PRAGMAS)
+CONFIGURATIONS = {
+    'per-request': (0, False),
+    'persistent': (60, False),
+    'persistent+pragmas': (60, True),
+}
+FEED_PAGES: int = 3  # По скольким страницам каждой ленты ходить
+
+
+def cache_config():
+    # Кэш фрагментов отключён, чтобы каждый запрос доходил до базы
+    return {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        }
+    }
+
+
+def feed_paths():
+    from posts.models import Group, User
+
+    paths = [f'/?page={page}' for page in range(1, FEED_PAGES + 1)]
+    paths += [
+        f'/group/{slug}/'
+        for slug in Group.objects.values_list('slug', flat=True)[:5]
+    ]
+    paths += [
+        f'/profile/{username}/'
+        for username in User.objects.values_list('username', flat=True)[:5]
+    ]
+    return paths
+
+
+def worker(args):
+    database, name, threads, seconds = args
+    conn_max_age, pragmas = CONFIGURATIONS[name]
+    setup_django(database=database, caches=cache_config())
+    from django.conf import settings
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.test import RequestFactory
+
+    settings.DEBUG = False
+    settings.DATABASES['default']['CONN_MAX_AGE'] = conn_max_age
+    if not pragmas:
+        # Режим WAL сохраняется в файле базы, поэтому возвращаем его явно
+        settings.SQLITE_PRAGMAS = {'journal_mode': 'DELETE'}
+    handler = WSGIHandler()
+    paths = feed_paths()
+    environ = RequestFactory()._base_environ
+    deadline = time.monotonic() + seconds
+    completed = [0] * threads
+
+    def run(number):
+        rng = random.Random(number)
+        while time.monotonic() < deadline:
+            path, _, query = rng.choice(paths).partition('?')
+            request = environ(
+                PATH_INFO=path, QUERY_STRING=query, REQUEST_METHOD='GET',
+                **{'wsgi.input': io.BytesIO()},
+            )
+            response = handler(request, lambda status, headers: None)
+            b''.join(response)
+            response.close()
+            completed[number] += 1
+
+    pool = [
+        threading.Thread(target=run, args=(number,))
+        for number in range(threads)
+    ]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return sum(completed) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--posts', type=int, default=20000)
+    args = parser.parse_args()
+
+    database = temp_database()
+    setup_django(database=database, caches=cache_config())
+    migrate()
+    from posts.seeding import seed_database
+
+    seed_database(
+        users=200, groups=10, posts=args.posts, comments=args.posts,
+        follows=10, image_ratio=0,
+    )
+    from django.db import connections
+
+    connections.close_all()
+
+    context = multiprocessing.get_context('spawn')
+    print(f'{"configuration":<20} {"req/s":>8}')
+    try:
+        for name in CONFIGURATIONS:
+            with context.Pool(1) as pool:
+                rate = pool.apply(
+                    worker, ((database, name, args.threads, args.seconds),)
+                )
+            print(f'{name:<20} {rate:>8.1f}')
+    finally:
+        remove_database(database)
+
+
+if __name__ == '__main__':
+    main()
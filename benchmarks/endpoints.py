@@ -0,0 +1,282 @@
+"""
+Задержки, число запросов к базе и размер ответа для всех адресов posts.
+
+Скрипт заполняет временную базу правдоподобными данными через mixer
+и Faker, как фикстуры тестов, затем обходит ленты, страницы постов
+и пишущие адреса тестовым клиентом. Результат сохраняется в JSON;
+с --baseline прогон сравнивается с прошлым и завершается с кодом 1,
+если p95 или число запросов выросли сильнее допустимого.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.endpoints --output bench.json
+    python -m benchmarks.endpoints --baseline bench.json --tolerance 0.2
+"""
+import argparse
+import io
+import json
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.utils import (
+    migrate, percentile, remove_database, setup_django, temp_database,
+)
+
+PERCENTILES = (50, 95, 99)
+# Запросы к базе сравниваются строго, задержки — с допуском
+QUERY_TOLERANCE: int = 0
+
+
+def cache_config():
+    return {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'benchmark',
+        }
+    }
+
+
+def placeholder_image(seed):
+    """Небольшая однотонная картинка в формате JPEG."""
+    from PIL import Image
+
+    rng = random.Random(seed)
+    color = tuple(rng.randrange(256) for _ in range(3))
+    buffer = io.BytesIO()
+    Image.new('RGB', (320, 240), color).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+def seed(users, groups, posts, comments, follows, images, rng_seed):
+    """
+    Заполняет базу через mixer.
+
+    Объекты сохраняются по одному, поэтому сигналы строят ленты
+    подписок, счётчики и поисковый индекс так же, как в работе.
+    """
+    from django.core.files.base import ContentFile
+    from django.db import transaction
+    from mixer.backend.django import mixer
+
+    from posts import thumbnails
+    from posts.models import Comment, Follow, Group, Post, User
+
+    rng = random.Random(rng_seed)
+    mixer.faker.seed_instance(rng_seed)
+    with transaction.atomic():
+        user_list = mixer.cycle(users).blend(User)
+        group_list = mixer.cycle(groups).blend(Group)
+        for user in user_list:
+            authors = rng.sample(user_list, min(follows, users))
+            for author in authors:
+                if author != user:
+                    Follow.objects.create(user=user, author=author)
+        post_list = mixer.cycle(posts).blend(
+            Post,
+            author=(rng.choice(user_list) for _ in range(posts)),
+            group=(rng.choice(group_list + [None]) for _ in range(posts)),
+            image='',
+        )
+        for number, post in enumerate(rng.sample(post_list, images)):
+            post.image.save(
+                f'bench_{number}.jpg',
+                ContentFile(placeholder_image(number)),
+            )
+            thumbnails.schedule(post)
+        mixer.cycle(comments).blend(
+            Comment,
+            post=(rng.choice(post_list) for _ in range(comments)),
+            author=(rng.choice(user_list) for _ in range(comments)),
+        )
+    while thumbnails.process_jobs(workers=1):
+        pass
+    return user_list, group_list, post_list
+
+
+def endpoints(user_list, group_list, post_list, rng):
+    """
+    Адреса для замеров: (имя, метод, функция адреса, функция данных).
+
+    Адрес и данные строятся заново на каждый запрос, чтобы записи не
+    повторялись, а чтения попадали на разные страницы.
+    """
+    from django.urls import reverse
+
+    def page(address):
+        return lambda: f'{address}?page={rng.randint(1, 3)}'
+
+    def some_post():
+        return rng.choice(post_list).pk
+
+    def some_author():
+        return rng.choice(user_list).username
+
+    return (
+        ('posts:index', 'get', page(reverse('posts:index')), None),
+        ('posts:group_list', 'get', lambda: reverse(
+            'posts:group_list', args=(rng.choice(group_list).slug,)
+        ), None),
+        ('posts:profile', 'get', lambda: reverse(
+            'posts:profile', args=(some_author(),)
+        ), None),
+        ('posts:post_detail', 'get', lambda: reverse(
+            'posts:post_detail', args=(some_post(),)
+        ), None),
+        ('posts:post_comments', 'get', lambda: reverse(
+            'posts:post_comments', args=(some_post(),)
+        ), None),
+        ('posts:follow_index', 'get', page(reverse('posts:follow_index')),
+         None),
+        ('posts:search', 'get', lambda: reverse('posts:search') + '?q=the',
+         None),
+        ('posts:post_create', 'post', lambda: reverse('posts:post_create'),
+         lambda: {'text': f'Бенчмарк {rng.random()}'}),
+        ('posts:add_comment', 'post', lambda: reverse(
+            'posts:add_comment', args=(some_post(),)
+        ), lambda: {'text': f'Комментарий {rng.random()}'}),
+        ('posts:profile_follow', 'get', lambda: reverse(
+            'posts:profile_follow', args=(some_author(),)
+        ), None),
+        ('posts:profile_unfollow', 'get', lambda: reverse(
+            'posts:profile_unfollow', args=(some_author(),)
+        ), None),
+    )
+
+
+def measure(client, method, address, data, requests):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    timings, queries, sizes = [], [], []
+    for _ in range(requests):
+        url = address()
+        payload = data() if data else None
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = getattr(client, method)(url, payload)
+            timings.append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            raise RuntimeError(f'{url}: {response.status_code}')
+        queries.append(len(captured))
+        sizes.append(len(response.content))
+    result = {
+        f'p{percent}_ms': round(percentile(timings, percent), 3)
+        for percent in PERCENTILES
+    }
+    result['queries'] = max(queries)
+    result['bytes'] = round(sum(sizes) / len(sizes))
+    return result
+
+
+def run(args):
+    from django.test import Client
+
+    rng = random.Random(args.seed)
+    user_list, group_list, post_list = seed(
+        args.users, args.groups, args.posts, args.comments,
+        args.follows, args.images, args.seed,
+    )
+    client = Client()
+    client.force_login(user_list[0])
+    results = {}
+    for name, method, address, data in endpoints(
+        user_list, group_list, post_list, rng
+    ):
+        # Первый запрос прогревает кэши и в замер не входит
+        measure(client, method, address, data, 1)
+        results[name] = measure(client, method, address, data, args.requests)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Список регрессий относительно прошлого прогона."""
+    failures = []
+    for name, result in results.items():
+        before = baseline.get('results', {}).get(name)
+        if before is None:
+            continue
+        if result['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            failures.append(
+                f'{name}: p95 {before["p95_ms"]} -> {result["p95_ms"]} ms'
+            )
+        if result['queries'] > before['queries'] + QUERY_TOLERANCE:
+            failures.append(
+                f'{name}: queries {before["queries"]} -> {result["queries"]}'
+            )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--groups', type=int, default=5)
+    parser.add_argument('--posts', type=int, default=500)
+    parser.add_argument('--comments', type=int, default=1000)
+    parser.add_argument('--follows', type=int, default=10,
+                        help='Подписок у каждого пользователя')
+    parser.add_argument('--images', type=int, default=20,
+                        help='Сколько постов получат картинку')
+    parser.add_argument('--requests', type=int, default=50,
+                        help='Запросов на каждый адрес')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Куда сохранить результат в JSON')
+    parser.add_argument('--baseline', help='JSON прошлого прогона')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Допустимый рост p95 относительно baseline')
+    args = parser.parse_args()
+
+    database = temp_database()
+    media = tempfile.mkdtemp(prefix='yatube_bench_media_')
+    setup_django(database=database, caches=cache_config())
+    from django.conf import settings
+
+    settings.DEBUG = False
+    settings.MEDIA_ROOT = media
+    try:
+        migrate()
+        results = run(args)
+    finally:
+        remove_database(database)
+        shutil.rmtree(media, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'dataset': {
+                key: getattr(args, key)
+                for key in ('users', 'groups', 'posts', 'comments',
+                            'follows', 'images', 'seed')
+            },
+            'requests': args.requests,
+        },
+        'results': results,
+    }
+    header = ' '.join(f'{f"p{p}, ms":>9}' for p in PERCENTILES)
+    print(f'{"endpoint":<24} {header} {"queries":>8} {"bytes":>8}')
+    for name, result in results.items():
+        timings = ' '.join(
+            f'{result[f"p{p}_ms"]:>9.2f}' for p in PERCENTILES
+        )
+        print(
+            f'{name:<24} {timings} {result["queries"]:>8} '
+            f'{result["bytes"]:>8}'
+        )
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2, ensure_ascii=False)
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            failures = compare(results, json.load(baseline), args.tolerance)
+        for failure in failures:
+            print(f'REGRESSION {failure}', file=sys.stderr)
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+Планы запросов лент до и после составных индексов.
+
+Для каждого запроса печатает EXPLAIN и медиану времени выполнения
+с индексами и без них. Индексы удаляются внутри транзакции, которая
+затем откатывается, поэтому база остаётся нетронутой.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.query_plans --posts 20000
+"""
+import argparse
+import random
+import time
+
+from benchmarks.utils import (
+    migrate, percentile, remove_database, setup_django, temp_database,
+)
+
+# SQLite не принимает больше 500 строк в одном INSERT ... SELECT
+BATCH_SIZE: int = 500
+
+
+def seed(posts, authors, groups, comments):
+    from posts.models import Comment, Follow, Group, Post, User
+
+    User.objects.bulk_create(
+        (User(username=f'bench_{i}') for i in range(authors)),
+        batch_size=BATCH_SIZE,
+    )
+    users = list(User.objects.filter(username__startswith='bench_'))
+    Group.objects.bulk_create(
+        Group(title=f'Группа {i}', slug=f'group-{i}', description='-')
+        for i in range(groups)
+    )
+    group_list = list(Group.objects.all())
+    rng = random.Random(0)
+    Post.objects.bulk_create(
+        (
+            Post(
+                text=f'Пост {i}',
+                author=rng.choice(users),
+                group=rng.choice(group_list),
+            )
+            for i in range(posts)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    Comment.objects.bulk_create(
+        (
+            Comment(
+                text=f'Комментарий {i}',
+                post_id=rng.choice(post_ids),
+                author=rng.choice(users),
+            )
+            for i in range(comments)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    Follow.objects.bulk_create(
+        (
+            Follow(user=user, author=author)
+            for user in users
+            for author in rng.sample(users, min(10, len(users)))
+            if user != author
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+
+def feed_queries():
+    """Запросы в том виде, в каком их строят представления."""
+    from posts.models import Comment, Follow, Group, User
+    from posts.utils import COUNT_PAGES, feed_queryset
+
+    group = Group.objects.first()
+    author = User.objects.filter(posts__isnull=False).first()
+    post = Comment.objects.first().post
+    follower = Follow.objects.first()
+    return {
+        'group feed': feed_queryset(group.posts.all())[:COUNT_PAGES],
+        'profile feed': feed_queryset(author.posts.all())[:COUNT_PAGES],
+        'post comments': Comment.objects.filter(post=post)[:COUNT_PAGES],
+        'follow lookup': Follow.objects.filter(
+            user_id=follower.user_id, author_id=follower.author_id
+        ),
+        'author followers': Follow.objects.filter(
+            author_id=follower.author_id
+        ).values_list('user_id', flat=True),
+    }
+
+
+def measure(queries, repeat):
+    results = {}
+    for name, queryset in queries.items():
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(queryset.all())
+            timings.append((time.perf_counter() - started) * 1000)
+        results[name] = (queryset.explain(), percentile(timings, 50))
+    return results
+
+
+def without_feed_indexes(queries, repeat):
+    """Замеры с удалёнными составными индексами; изменения откатываются."""
+    from django.db import connection, transaction
+    from posts.models import Comment, Follow, Post
+
+    # Схемный редактор SQLite не работает внутри транзакции, поэтому DROP
+    # INDEX выполняется напрямую: в SQLite он тоже откатывается
+    with transaction.atomic(), connection.cursor() as cursor:
+        for model in (Post, Comment, Follow):
+            for index in model._meta.indexes:
+                cursor.execute(
+                    f'DROP INDEX {connection.ops.quote_name(index.name)}'
+                )
+        results = measure(queries, repeat)
+        transaction.set_rollback(True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--posts', type=int, default=20000)
+    parser.add_argument('--authors', type=int, default=200)
+    parser.add_argument('--groups', type=int, default=20)
+    parser.add_argument('--comments', type=int, default=40000)
+    parser.add_argument('--repeat', type=int, default=50,
+                        help='Повторов каждого запроса для медианы')
+    args = parser.parse_args()
+
+    database = temp_database()
+    setup_django(database=database)
+    migrate()
+    seed(args.posts, args.authors, args.groups, args.comments)
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+    queries = feed_queries()
+    before = without_feed_indexes(queries, args.repeat)
+    after = measure(queries, args.repeat)
+    for name in queries:
+        print(f'== {name}')
+        for label, (plan, median) in (('before', before[name]),
+                                      ('after', after[name])):
+            print(f'-- {label}: {median:.3f} ms')
+            print(plan)
+        print()
+    remove_database(database)
+
+
+if __name__ == '__main__':
+    main()
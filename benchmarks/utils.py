@@ -0,0 +1,57 @@
+"""Общие помощники для запуска бенчмарков вне тестового раннера."""
+import os
+import sys
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIR = os.path.join(BASE_DIR, 'yatube')
+
+
+def setup_django(database=None, caches=None):
+    """
+    Настраивает Django для скрипта.
+
+    database: путь к файлу SQLite вместо рабочей базы проекта;
+    caches: словарь, заменяющий settings.CACHES.
+    """
+    if PROJECT_DIR not in sys.path:
+        sys.path.insert(0, PROJECT_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    import django
+    from django.conf import settings
+
+    django.setup()
+    # Подключения и кэши создаются лениво, поэтому настройки ещё можно менять
+    if database is not None:
+        settings.DATABASES['default']['NAME'] = database
+    if caches is not None:
+        settings.CACHES = caches
+
+
+def temp_database():
+    """Путь к новому файлу SQLite во временном каталоге."""
+    handle, path = tempfile.mkstemp(prefix='yatube_bench_', suffix='.sqlite3')
+    os.close(handle)
+    return path
+
+
+def remove_database(path):
+    """Удаляет файл SQLite вместе с журналом WAL."""
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def migrate():
+    from django.core.management import call_command
+
+    call_command('migrate', verbosity=0, interactive=False)
+
+
+def percentile(values, percent):
+    """Перцентиль по методу ближайшего ранга."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(round(percent / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
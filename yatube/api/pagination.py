@@ -0,0 +1,61 @@
+"""
+Курсорная навигация по спискам API.
+
+Курсор хранит значения полей сортировки последней отданной записи,
+следующая страница отбирается условием «после этой записи» по тому же
+индексу, без OFFSET и без COUNT(*).
+"""
+import base64
+import json
+import operator
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+def encode_cursor(values):
+    """Непрозрачный курсор по значениям полей сортировки."""
+    payload = json.dumps([
+        value.isoformat() if hasattr(value, 'isoformat') else value
+        for value in values
+    ])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(model, ordering, cursor):
+    """Значения полей сортировки из курсора. Для битого — None."""
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(values, list) or len(values) != len(ordering):
+        return None
+    # to_python пропускает None, а сравнивать с NULL нельзя
+    if None in values:
+        return None
+    try:
+        return [
+            model._meta.get_field(field.lstrip('-')).to_python(value)
+            for field, value in zip(ordering, values)
+        ]
+    except (TypeError, ValidationError):
+        # Например, число вместо строки даты: parse_datetime(123)
+        return None
+
+
+def keyset(queryset, ordering, key=None):
+    """Записи в порядке ordering, идущие после записи с ключом key."""
+    queryset = queryset.order_by(*ordering)
+    if key is None:
+        return queryset
+    # (a, b) после (x, y): a < x ИЛИ (a = x И b < y) — для убывания
+    conditions = []
+    equal = {}
+    for field, value in zip(ordering, key):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        conditions.append(Q(**equal, **{f'{name}__{lookup}': value}))
+        equal[name] = value
+    return queryset.filter(reduce(operator.or_, conditions))
@@ -0,0 +1,155 @@
+"""
+Ресурсы API: какие поля отдаются и откуда они читаются.
+
+Поле ресурса — путь ORM, по которому values_list достаёт значение
+сразу из строки запроса, без создания моделей. JOIN с автором или
+группой появляется в SQL, только если клиент запросил такое поле
+(?fields=), — это замена select_related для сериализации кортежами.
+Вложенные списки (комментарии поста) читаются одним дополнительным
+запросом на все строки ответа, как prefetch_related.
+"""
+from collections import defaultdict
+
+from django.core.files.storage import default_storage
+
+from posts.models import Comment, Follow, Group, Post
+
+
+class ApiError(Exception):
+    """Ошибка запроса к API: уходит клиенту в JSON с кодом status."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _isoformat(value):
+    return value.isoformat()
+
+
+def _image_url(name):
+    return default_storage.url(name) if name else None
+
+
+class Resource:
+    """Модель, поля ответа и порядок выдачи."""
+    model = None
+    # Имя поля в ответе: путь ORM для values_list
+    fields = {}
+    # Преобразования значений, которые не переводятся в JSON как есть
+    converters = {}
+    # Вложенные списки: имя поля -> метод, читающий их по id строк
+    related = {}
+    # Порядок выдачи и ключ курсора; последним всегда идёт id
+    ordering = ('-id',)
+    # Порядок для ?modified_after=: изменения от старых к новым
+    sync_ordering = ('modified', 'id')
+
+    def field_names(self, value, related=False):
+        """Поля из ?fields=; без параметра — все простые поля."""
+        if not value:
+            return list(self.fields)
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        allowed = set(self.fields) | (set(self.related) if related else set())
+        unknown = [name for name in names if name not in allowed]
+        if unknown:
+            raise ApiError(f'Неизвестные поля: {", ".join(unknown)}')
+        return names
+
+    def serialize(self, queryset, names, limit=None, ordering=None):
+        """Словари для ответа и ключи сортировки каждой строки."""
+        plain = [name for name in names if name in self.fields]
+        keys = [field.lstrip('-') for field in ordering or self.ordering]
+        rows = queryset.values_list(
+            *keys, *(self.fields[name] for name in plain)
+        )
+        if limit is not None:
+            rows = rows[:limit]
+        results, row_keys = [], []
+        for row in rows:
+            row_keys.append(row[:len(keys)])
+            item = {}
+            for name, value in zip(plain, row[len(keys):]):
+                converter = self.converters.get(name)
+                if converter is not None and value is not None:
+                    value = converter(value)
+                item[name] = value
+            results.append(item)
+        for name in names:
+            if name in self.related:
+                ids = [key[-1] for key in row_keys]
+                nested = getattr(self, self.related[name])(ids)
+                for item, key in zip(results, row_keys):
+                    item[name] = nested.get(key[-1], [])
+        return results, row_keys
+
+
+class PostResource(Resource):
+    model = Post
+    fields = {
+        'id': 'id',
+        'text': 'text',
+        'pub_date': 'pub_date',
+        'author': 'author__username',
+        'group': 'group__slug',
+        'image': 'image',
+        'comments_count': 'comments_count',
+        'modified': 'modified',
+        'version': 'version',
+    }
+    converters = {
+        'pub_date': _isoformat,
+        'modified': _isoformat,
+        'image': _image_url,
+    }
+    related = {'comments': 'comments_for'}
+    ordering = ('-pub_date', '-id')
+
+    def comments_for(self, post_ids):
+        comments = defaultdict(list)
+        rows = Comment.objects.filter(post_id__in=post_ids).order_by(
+            'pub_date', 'id'
+        ).values_list('post_id', 'id', 'author__username', 'text', 'pub_date')
+        for post_id, pk, author, text, pub_date in rows:
+            comments[post_id].append({
+                'id': pk,
+                'author': author,
+                'text': text,
+                'pub_date': pub_date.isoformat(),
+            })
+        return comments
+
+
+class CommentResource(Resource):
+    model = Comment
+    fields = {
+        'id': 'id',
+        'post': 'post_id',
+        'author': 'author__username',
+        'text': 'text',
+        'pub_date': 'pub_date',
+        'modified': 'modified',
+        'version': 'version',
+    }
+    converters = {'pub_date': _isoformat, 'modified': _isoformat}
+    ordering = ('-pub_date', '-id')
+
+
+class GroupResource(Resource):
+    model = Group
+    fields = {
+        'id': 'id',
+        'title': 'title',
+        'slug': 'slug',
+        'description': 'description',
+    }
+    ordering = ('id',)
+
+
+class FollowResource(Resource):
+    model = Follow
+    fields = {
+        'id': 'id',
+        'user': 'user__username',
+        'author': 'author__username',
+    }
@@ -0,0 +1,143 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from api.pagination import encode_cursor
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Тестовый текст {number}',
+                author=cls.author,
+                group=cls.group if number % 2 else None,
+            )
+            for number in range(5)
+        ]
+        cls.comment = Comment.objects.create(
+            text='Тестовый комментарий', post=cls.posts[0], author=cls.user
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ApiTest.user)
+
+    def test_post_list_cursor_pagination(self):
+        """Курсор обходит все посты от новых к старым без повторов."""
+        address = reverse('api:post_list') + '?limit=2'
+        texts = []
+        while address:
+            response = self.guest_client.get(address).json()
+            self.assertLessEqual(len(response['results']), 2)
+            texts += [post['text'] for post in response['results']]
+            address = response['next']
+        self.assertEqual(
+            texts, [post.text for post in reversed(ApiTest.posts)]
+        )
+
+    def test_fields_selection(self):
+        """?fields= оставляет только нужные поля и обходится без JOIN."""
+        with self.assertNumQueries(1) as captured:
+            response = self.guest_client.get(
+                reverse('api:post_list'), {'fields': 'id,text'}
+            )
+        self.assertNotIn('JOIN', captured.captured_queries[0]['sql'])
+        self.assertEqual(
+            set(response.json()['results'][0]), {'id', 'text'}
+        )
+        response = self.guest_client.get(
+            reverse('api:post_list'), {'fields': 'id,password'}
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.guest_client.get(
+            reverse('api:post_list'), {'cursor': 'broken'}
+        )
+        self.assertEqual(response.status_code, 400)
+        # Значения неверного типа в правильно закодированном курсоре
+        for values in ([123, 1], [None, 1]):
+            response = self.guest_client.get(
+                reverse('api:post_list'), {'cursor': encode_cursor(values)}
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('Неверный курсор', response.content.decode())
+
+    def test_filters_and_detail(self):
+        """Фильтр по группе, пост с комментариями и комментарии поста."""
+        response = self.guest_client.get(
+            reverse('api:post_list'), {'group': ApiTest.group.slug}
+        )
+        self.assertEqual(len(response.json()['results']), 2)
+        post = ApiTest.posts[0]
+        response = self.guest_client.get(
+            reverse('api:post_detail', args=(post.pk,)),
+            {'fields': 'id,author,comments'},
+        ).json()
+        self.assertEqual(response['author'], 'TestAuthor')
+        self.assertEqual(
+            [comment['text'] for comment in response['comments']],
+            ['Тестовый комментарий'],
+        )
+        response = self.guest_client.get(
+            reverse('api:comment_list', args=(post.pk,))
+        ).json()
+        self.assertEqual(response['results'][0]['id'], ApiTest.comment.pk)
+        response = self.guest_client.get(
+            reverse('api:post_detail', args=(post.pk + 100,))
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_modified_after_sync(self):
+        """?modified_after= отдаёт изменённые посты от старых к новым."""
+        edited = Post.objects.get(pk=ApiTest.posts[1].pk)
+        moment = Post.objects.get(pk=ApiTest.posts[-1].pk).modified
+        edited.text = 'Исправленный текст'
+        edited.save()
+        response = self.guest_client.get(reverse('api:post_list'), {
+            'modified_after': moment.isoformat(),
+            'fields': 'id,version',
+        })
+        self.assertEqual(
+            response.json()['results'], [{'id': edited.pk, 'version': 2}]
+        )
+        for value in ('вчера', '2020-13-45T00:00'):
+            response = self.guest_client.get(
+                reverse('api:post_list'), {'modified_after': value}
+            )
+            self.assertEqual(response.status_code, 400)
+
+    def test_etag_not_modified(self):
+        """Повторный запрос с If-None-Match получает пустой 304."""
+        address = reverse('api:group_detail', args=(ApiTest.group.slug,))
+        response = self.guest_client.get(address)
+        self.assertEqual(response.json()['title'], 'Тестовая группа')
+        response = self.guest_client.get(
+            address, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_follows_require_login(self):
+        """Подписки видит только вошедший пользователь."""
+        response = self.guest_client.get(reverse('api:follow_list'))
+        self.assertEqual(response.status_code, 401)
+        response = self.authorized_client.get(reverse('api:follow_list'))
+        self.assertEqual(
+            response.json()['results'],
+            [{
+                'id': Follow.objects.get().pk,
+                'user': 'TestUser',
+                'author': 'TestAuthor',
+            }],
+        )
@@ -0,0 +1,150 @@
+from functools import wraps
+
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import conditional_page, require_GET
+
+from core.routers import replica_reads
+from posts.models import Comment, Follow, Group, Post
+
+from . import pagination
+from .resources import (
+    ApiError, CommentResource, FollowResource, GroupResource, PostResource,
+)
+
+API_PAGE_SIZE: int = 20  # Записей на странице списка по умолчанию
+API_MAX_PAGE_SIZE: int = 100  # Наибольшее значение ?limit=
+
+
+def json_response(data, status=200):
+    return JsonResponse(
+        data, status=status, json_dumps_params={'ensure_ascii': False}
+    )
+
+
+def api_view(view):
+    """
+    GET-представление API: ошибки в JSON, чтение с реплик и ETag.
+
+    ETag считается по телу ответа: при совпадении с If-None-Match
+    клиент получает пустой ответ 304 вместо повторной выдачи JSON.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as error:
+            return json_response({'detail': str(error)}, error.status)
+    return replica_reads(conditional_page(require_GET(wrapper)))
+
+
+def page_size(request):
+    value = request.GET.get('limit')
+    if not value:
+        return API_PAGE_SIZE
+    if not value.isdigit() or not 1 <= int(value) <= API_MAX_PAGE_SIZE:
+        raise ApiError(f'limit должен быть от 1 до {API_MAX_PAGE_SIZE}')
+    return int(value)
+
+
+def modified_after(request, resource, queryset):
+    """
+    Фильтр ?modified_after= для синхронизации.
+
+    Возвращает записи, изменённые позже указанного момента, и порядок
+    от старых изменений к новым, или исходные запрос и порядок.
+    """
+    value = request.GET.get('modified_after')
+    if not value or 'modified' not in resource.fields:
+        return queryset, resource.ordering
+    try:
+        moment = parse_datetime(value)
+    except ValueError:
+        # Формат верный, но такой даты нет: 2020-13-45
+        moment = None
+    if moment is None:
+        raise ApiError('modified_after должен быть датой в формате ISO 8601')
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, timezone.utc)
+    return queryset.filter(modified__gt=moment), resource.sync_ordering
+
+
+def list_response(request, resource, queryset):
+    """Страница списка по курсору и ссылка на следующую."""
+    names = resource.field_names(request.GET.get('fields'))
+    limit = page_size(request)
+    queryset, ordering = modified_after(request, resource, queryset)
+    key = None
+    cursor = request.GET.get('cursor')
+    if cursor:
+        key = pagination.decode_cursor(resource.model, ordering, cursor)
+        if key is None:
+            raise ApiError('Неверный курсор')
+    queryset = pagination.keyset(queryset, ordering, key)
+    # Одна лишняя строка показывает, есть ли следующая страница
+    results, keys = resource.serialize(queryset, names, limit + 1, ordering)
+    next_url = None
+    if len(results) > limit:
+        results = results[:limit]
+        query = request.GET.copy()
+        query['cursor'] = pagination.encode_cursor(keys[limit - 1])
+        next_url = f'{request.path}?{query.urlencode()}'
+    return json_response({'results': results, 'next': next_url})
+
+
+def detail_response(request, resource, queryset):
+    names = resource.field_names(request.GET.get('fields'), related=True)
+    results, _ = resource.serialize(queryset, names, 1)
+    if not results:
+        raise ApiError('Не найдено', status=404)
+    return json_response(results[0])
+
+
+@api_view
+def post_list(request):
+    posts = Post.objects.all()
+    group = request.GET.get('group')
+    if group:
+        posts = posts.filter(group__slug=group)
+    author = request.GET.get('author')
+    if author:
+        posts = posts.filter(author__username=author)
+    return list_response(request, PostResource(), posts)
+
+
+@api_view
+def post_detail(request, post_id):
+    return detail_response(
+        request, PostResource(), Post.objects.filter(pk=post_id)
+    )
+
+
+@api_view
+def comment_list(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        raise ApiError('Не найдено', status=404)
+    return list_response(
+        request, CommentResource(), Comment.objects.filter(post_id=post_id)
+    )
+
+
+@api_view
+def group_list(request):
+    return list_response(request, GroupResource(), Group.objects.all())
+
+
+@api_view
+def group_detail(request, slug):
+    return detail_response(
+        request, GroupResource(), Group.objects.filter(slug=slug)
+    )
+
+
+@api_view
+def follow_list(request):
+    if not request.user.is_authenticated:
+        raise ApiError('Требуется вход', status=401)
+    return list_response(
+        request, FollowResource(), Follow.objects.filter(user=request.user)
+    )
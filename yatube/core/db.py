@@ -0,0 +1,30 @@
+"""
+Настройка соединений с базой.
+
+Новому соединению SQLite выставляются SQLITE_PRAGMAS, а перед каждым
+запросом постоянные соединения (CONN_MAX_AGE > 0) проверяются на
+живость, если включено DB_HEALTH_CHECKS: иначе первый запрос после
+разрыва связи с сервером базы упал бы с ошибкой.
+"""
+from django.conf import settings
+from django.db import connections
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Выставляет PRAGMA новому соединению SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+
+
+def check_connections(**kwargs):
+    """Закрывает постоянные соединения, которые перестали отвечать."""
+    if not getattr(settings, 'DB_HEALTH_CHECKS', False):
+        return
+    for connection in connections.all():
+        if connection.connection is None or connection.in_atomic_block:
+            continue
+        if not connection.is_usable():
+            connection.close()
@@ -0,0 +1,25 @@
+import uuid
+
+from django.core.cache import caches
+
+
+def check_cache(alias='default'):
+    """Пишет, читает и удаляет ключ в кэше; True, если кэш отвечает."""
+    cache = caches[alias]
+    key = f'health:{uuid.uuid4().hex}'
+    try:
+        cache.set(key, 'ok', 10)
+        alive = cache.get(key) == 'ok'
+        cache.delete(key)
+    except Exception:
+        return False
+    return alive
+
+
+CHECKS = {
+    'cache': check_cache,
+}
+
+
+def run_checks():
+    return {name: check() for name, check in CHECKS.items()}
@@ -0,0 +1,284 @@
+"""
+Метрики в текстовом формате Prometheus.
+
+Каждый процесс копит счётчики и гистограммы у себя в памяти. При
+METRICS_DIR процесс раз в METRICS_FLUSH_INTERVAL секунд сохраняет свой
+снимок в отдельный файл, а /metrics складывает снимки всех процессов:
+так работают несколько воркеров gunicorn без общей памяти и блокировок
+между процессами. Без METRICS_DIR отдаются метрики текущего процесса.
+"""
+import atexit
+import contextvars
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+# Границы корзин гистограммы задержек, секунды
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+METRICS_FLUSH_INTERVAL: int = 5  # Как часто процесс сохраняет снимок
+
+# Имя метрики: (тип, описание)
+METRICS = {
+    'yatube_view_latency_seconds': (
+        'histogram', 'Время ответа представления'
+    ),
+    'yatube_posts_created_total': ('counter', 'Созданные посты'),
+    'yatube_comments_created_total': ('counter', 'Созданные комментарии'),
+    'yatube_follows_created_total': ('counter', 'Созданные подписки'),
+    'yatube_cache_requests_total': (
+        'counter', 'Чтения фрагментов и миниатюр из кэша'
+    ),
+    'yatube_db_queries_total': ('counter', 'SQL-запросы'),
+    'yatube_db_query_seconds_total': ('counter', 'Время SQL-запросов'),
+    'yatube_db_connections_total': ('counter', 'Открытые подключения к базе'),
+}
+
+# Ключи кэша, попадания в которые считаются: префикс -> имя кэша
+FRAGMENT_PREFIX = 'template.cache.'
+THUMBNAIL_PREFIX = 'posts:thumbnail:'
+
+
+class Registry:
+    """Метрики одного процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] += value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                # Корзины, затем сумма и число наблюдений
+                histogram = self.histograms[key] = [0] * (
+                    len(LATENCY_BUCKETS) + 3
+                )
+            histogram[bisect_left(LATENCY_BUCKETS, value)] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'counters': [
+                    [name, dict(labels), value]
+                    for (name, labels), value in self.counters.items()
+                ],
+                'histograms': [
+                    [name, dict(labels), list(values)]
+                    for (name, labels), values in self.histograms.items()
+                ],
+            }
+
+
+registry = Registry()
+inc = registry.inc
+observe = registry.observe
+
+
+def merge(snapshots):
+    """Складывает снимки процессов."""
+    counters = defaultdict(float)
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            counters[name, tuple(sorted(labels.items()))] += value
+        for name, labels, values in snapshot['histograms']:
+            key = (name, tuple(sorted(labels.items())))
+            if key in histograms:
+                histograms[key] = [
+                    a + b for a, b in zip(histograms[key], values)
+                ]
+            else:
+                histograms[key] = list(values)
+    return counters, histograms
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(
+        '{}="{}"'.format(
+            key, str(value).replace('\\', r'\\').replace('"', r'\"')
+        )
+        for key, value in pairs
+    ) + '}'
+
+
+def render(counters, histograms):
+    """Текст в формате экспозиции Prometheus 0.0.4."""
+    series = defaultdict(list)
+    for (name, labels), value in sorted(counters.items()):
+        series[name].append(f'{name}{_labels(labels)} {value:g}')
+    for (name, labels), values in sorted(histograms.items()):
+        cumulative = 0
+        bounds = [f'{bound:g}' for bound in LATENCY_BUCKETS] + ['+Inf']
+        for bound, count in zip(bounds, values[:-2]):
+            cumulative += count
+            series[name].append(
+                f'{name}_bucket{_labels(labels, le=bound)} {cumulative}'
+            )
+        series[name].append(f'{name}_sum{_labels(labels)} {values[-2]:g}')
+        series[name].append(f'{name}_count{_labels(labels)} {values[-1]}')
+    lines = []
+    for name, (kind, description) in METRICS.items():
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        lines.extend(series.get(name, ()))
+    return '\n'.join(lines) + '\n'
+
+
+def _snapshot_path():
+    return os.path.join(settings.METRICS_DIR, f'{os.getpid()}.json')
+
+
+def flush():
+    """Атомарно сохраняет снимок процесса в METRICS_DIR."""
+    directory = getattr(settings, 'METRICS_DIR', None)
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(handle, 'w') as output:
+        json.dump(registry.snapshot(), output)
+    os.replace(temporary, _snapshot_path())
+
+
+def collect():
+    """Метрики всех процессов (или только текущего без METRICS_DIR)."""
+    snapshots = [registry.snapshot()]
+    directory = getattr(settings, 'METRICS_DIR', None)
+    if directory and os.path.isdir(directory):
+        own = os.path.basename(_snapshot_path())
+        for name in os.listdir(directory):
+            if name == own or not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(directory, name)) as snapshot:
+                    snapshots.append(json.load(snapshot))
+            except (OSError, ValueError):
+                # Файл мог смениться между listdir и open
+                continue
+    return render(*merge(snapshots))
+
+
+# Базовый get_many вызывает get по ключу: такие чтения уже посчитаны
+_in_get_many = contextvars.ContextVar('in_get_many', default=False)
+
+
+def _cache_name(key):
+    if key.startswith(FRAGMENT_PREFIX):
+        return key[len(FRAGMENT_PREFIX):].split('.', 1)[0]
+    if key.startswith(THUMBNAIL_PREFIX):
+        return 'thumbnail'
+    return None
+
+
+def _counted_get(get):
+    def _get(self, key, default=None, version=None):
+        value = get(self, key, default, version)
+        name = _cache_name(key)
+        if name is not None and not _in_get_many.get():
+            inc(
+                'yatube_cache_requests_total', cache=name,
+                result='miss' if value is default else 'hit',
+            )
+        return value
+    return _get
+
+
+def _counted_get_many(get_many):
+    def _get_many(self, keys, version=None):
+        token = _in_get_many.set(True)
+        try:
+            found = get_many(self, keys, version)
+        finally:
+            _in_get_many.reset(token)
+        for key in keys:
+            name = _cache_name(key)
+            if name is not None:
+                inc(
+                    'yatube_cache_requests_total', cache=name,
+                    result='hit' if key in found else 'miss',
+                )
+        return found
+    return _get_many
+
+
+_installed = False
+
+
+def install():
+    """Один раз подключает счётчики кэша и снимок при выходе."""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    for backend in {type(caches[alias]) for alias in settings.CACHES}:
+        backend.get = _counted_get(backend.get)
+        backend.get_many = _counted_get_many(backend.get_many)
+    atexit.register(flush)
+
+
+def count_connection(sender, connection, **kwargs):
+    inc('yatube_db_connections_total', alias=connection.alias)
+
+
+class MetricsMiddleware:
+    """Задержка каждого представления и SQL-запросы, которые оно сделало."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.flushed = time.monotonic()
+        install()
+
+    def count_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            alias = context['connection'].alias
+            inc('yatube_db_queries_total', alias=alias)
+            inc(
+                'yatube_db_query_seconds_total',
+                time.perf_counter() - started,
+                alias=alias,
+            )
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(self.count_query)
+                )
+            response = self.get_response(request)
+        match = getattr(request, 'resolver_match', None)
+        observe(
+            'yatube_view_latency_seconds',
+            time.perf_counter() - started,
+            view=match.view_name if match else '<unresolved>',
+        )
+        if time.monotonic() - self.flushed > METRICS_FLUSH_INTERVAL:
+            self.flushed = time.monotonic()
+            flush()
+        return response
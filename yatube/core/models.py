@@ -11,3 +11,39 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class VersionedModel(CreatedModel):
+    """
+    Абстрактная модель. Добавляет время изменения и номер версии.
+
+    Оба поля обновляются при каждом сохранении. Версия увеличивается
+    в самом UPDATE, поэтому два одновременных сохранения не получат
+    один и тот же номер.
+    """
+    modified = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True,
+        db_index=True
+    )
+    version = models.PositiveIntegerField(
+        'Версия',
+        default=1,
+        editable=False
+    )
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'modified', 'version'}
+        self.version = models.F('version') + 1
+        try:
+            super().save(*args, **kwargs)
+        finally:
+            # Новый номер прочитается из базы при первом обращении
+            del self.version
@@ -0,0 +1,218 @@
+"""
+Профилирование запросов: SQL, шаблоны и кэш.
+
+ProfilingMiddleware собирает число и время SQL-запросов, повторы
+(признак N+1), время отрисовки каждого шаблона и попадания в кэш.
+Итог уходит в заголовок Server-Timing и в лог core.profiling одной
+JSON-строкой.
+
+Замеры включаются настройкой PROFILING_ENABLED для доли запросов
+PROFILING_SAMPLE_RATE или заголовком PROFILING_HEADER (только при DEBUG
+и для сотрудников). Если выключено и то и другое, middleware не
+подключается вовсе, а перехваты шаблонов и кэша сводятся к проверке
+одной переменной контекста.
+"""
+import contextvars
+import json
+import logging
+import random
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Template
+
+logger = logging.getLogger(__name__)
+
+# Один и тот же запрос с разными параметрами чаще этого — вероятный N+1
+SIMILAR_QUERIES_THRESHOLD: int = 5
+SERVER_TIMING_TEMPLATES: int = 5  # Сколько самых долгих шаблонов выводить
+
+_current = contextvars.ContextVar('profile', default=None)
+_installed = False
+_MISSING = object()
+
+
+class Profile:
+    """Замеры одного запроса."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []
+        self.templates = defaultdict(float)
+        self.template_calls = Counter()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def sql_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                (sql, repr(params), time.perf_counter() - started)
+            )
+
+    @property
+    def sql_time(self):
+        return sum(duration for _, _, duration in self.queries)
+
+    def duplicates(self):
+        """Запросы, выполненные больше одного раза с теми же параметрами."""
+        counts = Counter((sql, params) for sql, params, _ in self.queries)
+        return sum(count - 1 for count in counts.values() if count > 1)
+
+    def similar(self):
+        """Одинаковые запросы с разными параметрами сверх порога."""
+        counts = Counter(sql for sql, _, _ in self.queries)
+        return {
+            sql: count for sql, count in counts.most_common()
+            if count >= SIMILAR_QUERIES_THRESHOLD
+        }
+
+    def summary(self, request, response):
+        return {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(
+                (time.perf_counter() - self.started) * 1000, 3
+            ),
+            'db_queries': len(self.queries),
+            'db_ms': round(self.sql_time * 1000, 3),
+            'db_duplicates': self.duplicates(),
+            'db_similar': self.similar(),
+            'templates': {
+                name: {
+                    'ms': round(duration * 1000, 3),
+                    'calls': self.template_calls[name],
+                }
+                for name, duration in self.templates.items()
+            },
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+
+    def server_timing(self, summary):
+        metrics = [
+            f'db;dur={summary["db_ms"]};desc="{summary["db_queries"]} '
+            f'queries, {summary["db_duplicates"]} duplicates"',
+            f'cache;desc="{summary["cache_hits"]} hits, '
+            f'{summary["cache_misses"]} misses"',
+        ]
+        slowest = sorted(
+            summary['templates'].items(),
+            key=lambda item: item[1]['ms'],
+            reverse=True,
+        )[:SERVER_TIMING_TEMPLATES]
+        metrics.extend(
+            f'tpl;dur={timing["ms"]};desc="{name}"'
+            for name, timing in slowest
+        )
+        metrics.append(f'total;dur={summary["total_ms"]}')
+        return ', '.join(metrics)
+
+
+def _profiled_render(render):
+    def _render(self, context):
+        profile = _current.get()
+        if profile is None:
+            return render(self, context)
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            name = self.origin.template_name or '<string>'
+            profile.templates[name] += time.perf_counter() - started
+            profile.template_calls[name] += 1
+    return _render
+
+
+def _profiled_get(get):
+    def _get(self, key, default=None, version=None):
+        profile = _current.get()
+        if profile is None:
+            return get(self, key, default, version)
+        value = get(self, key, _MISSING, version)
+        if value is _MISSING:
+            profile.cache_misses += 1
+            return default
+        profile.cache_hits += 1
+        return value
+    return _get
+
+
+def _profiled_get_many(get_many):
+    def _get_many(self, keys, version=None):
+        profile = _current.get()
+        if profile is None:
+            return get_many(self, keys, version)
+        # Базовый get_many вызывает get для каждого ключа: не считаем дважды
+        token = _current.set(None)
+        try:
+            found = get_many(self, keys, version)
+        finally:
+            _current.reset(token)
+        profile.cache_hits += len(found)
+        profile.cache_misses += len(keys) - len(found)
+        return found
+    return _get_many
+
+
+def install():
+    """Один раз оборачивает отрисовку шаблонов и чтение из кэшей."""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    Template._render = _profiled_render(Template._render)
+    for backend in {type(caches[alias]) for alias in settings.CACHES}:
+        backend.get = _profiled_get(backend.get)
+        backend.get_many = _profiled_get_many(backend.get_many)
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.enabled = getattr(settings, 'PROFILING_ENABLED', False)
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 1.0)
+        self.header = getattr(settings, 'PROFILING_HEADER', None)
+        if not self.enabled and not self.header:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        install()
+
+    def should_profile(self, request):
+        if self.header and request.META.get(self.header):
+            user = getattr(request, 'user', None)
+            if settings.DEBUG or (user is not None and user.is_staff):
+                return True
+        return self.enabled and random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+        profile = Profile()
+        token = _current.set(profile)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(profile.sql_wrapper)
+                    )
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        summary = profile.summary(request, response)
+        response['Server-Timing'] = profile.server_timing(summary)
+        logger.info(json.dumps(summary, ensure_ascii=False))
+        if summary['db_similar']:
+            logger.warning(
+                'Возможный N+1 в %s: %s',
+                request.path,
+                json.dumps(summary['db_similar'], ensure_ascii=False),
+            )
+        return response
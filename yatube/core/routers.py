@@ -0,0 +1,109 @@
+"""
+Чтение лент с реплик базы.
+
+Представления, помеченные @replica_reads, читают из случайной реплики
+из DATABASE_REPLICAS, все остальные запросы и любая запись идут в
+default. Реплика отстаёт от основной базы, поэтому запрос, который
+что-то записал, ставит cookie REPLICA_STICKY_COOKIE: пока она жива
+(REPLICA_STICKY_SECONDS), пользователь читает только из default и
+сразу видит свой пост, комментарий или подписку.
+"""
+import contextvars
+import random
+
+from django.conf import settings
+
+REPLICA_STICKY_COOKIE = 'primary'
+# Записи в эти таблицы не влияют на то, что пользователь читает с реплик
+UNPINNED_MODELS = frozenset({
+    'django_cache.cacheentry',
+    'posts.thumbnailjob',
+})
+
+_routing = contextvars.ContextVar('routing', default=None)
+
+
+class Routing:
+    """Выбор базы в рамках одного запроса."""
+
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+
+
+def replica_reads(view):
+    """Помечает представление, которому можно читать с реплики."""
+    view.replica_reads = True
+    return view
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', ())
+
+
+def reads_from_replica():
+    """Читает ли текущий запрос с реплики."""
+    routing = _routing.get()
+    return routing is not None and routing.replica is not None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None and routing.replica is not None:
+            return routing.replica
+        return None
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if (
+            routing is not None
+            and model._meta.label_lower not in UNPINNED_MODELS
+        ):
+            routing.wrote = True
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db in replicas():
+            # Объект прочитан с реплики, но записывается всегда в default
+            return 'default'
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии default: объекты из них можно связывать
+        databases = {'default', *replicas()}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+
+class ReplicaMiddleware:
+    """Выбирает реплику для помеченных представлений и ставит cookie."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        routing = _routing.get()
+        if (
+            routing is not None
+            and replicas()
+            and getattr(view_func, 'replica_reads', False)
+            and REPLICA_STICKY_COOKIE not in request.COOKIES
+        ):
+            # Одна реплика на весь запрос: страница читает один снимок
+            routing.replica = random.choice(replicas())
+
+    def __call__(self, request):
+        routing = Routing()
+        token = _routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        if routing.wrote and replicas():
+            response.set_cookie(
+                REPLICA_STICKY_COOKIE, '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
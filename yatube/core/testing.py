@@ -0,0 +1,32 @@
+"""
+Запуск тестов с отдельным кэшем.
+
+Тесты очищают кэш и не должны читать фрагменты, отрисованные по другой
+базе, поэтому на время прогона кэш по умолчанию подменяется кэшем в
+памяти процесса, какой бы ни была настройка окружения. TestRunner
+делает это для manage.py test, фикстура в tests/conftest.py — для pytest.
+"""
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'yatube-tests',
+    }
+}
+
+
+def isolated_cache():
+    return override_settings(CACHES=TEST_CACHES)
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._isolated_cache = isolated_cache()
+        self._isolated_cache.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._isolated_cache.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,31 @@
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from core.db import check_connections
+
+
+class DatabaseConnectionTest(TestCase):
+    @skipUnless(connection.vendor == 'sqlite', 'PRAGMA есть только у SQLite')
+    def test_sqlite_pragmas_applied(self):
+        """Новое соединение SQLite получает PRAGMA из настроек."""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            # 1 — NORMAL
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+
+    @override_settings(DB_HEALTH_CHECKS=True)
+    def test_broken_persistent_connection_closed(self):
+        """Соединение, которое не отвечает, закрывается до запроса."""
+        alive = mock.Mock(connection=object(), in_atomic_block=False)
+        alive.is_usable.return_value = True
+        broken = mock.Mock(connection=object(), in_atomic_block=False)
+        broken.is_usable.return_value = False
+        with mock.patch('core.db.connections') as connections:
+            connections.all.return_value = [alive, broken]
+            check_connections()
+        alive.close.assert_not_called()
+        broken.close.assert_called_once()
@@ -0,0 +1,25 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.test import Client, TestCase
+
+
+class HealthTest(TestCase):
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_health_ok(self):
+        """Страница /health/ отвечает 200, когда кэш доступен."""
+        response = self.guest_client.get('/health/')
+        self.assertEqual(response.status_code, HTTPStatus.OK.value)
+        self.assertEqual(response.json()['checks'], {'cache': True})
+
+    def test_health_cache_down(self):
+        """Недоступный кэш даёт 503."""
+        with mock.patch.dict(
+            'core.health.CHECKS', {'cache': lambda: False}
+        ):
+            response = self.guest_client.get('/health/')
+        self.assertEqual(
+            response.status_code, HTTPStatus.SERVICE_UNAVAILABLE.value
+        )
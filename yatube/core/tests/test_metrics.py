@@ -0,0 +1,61 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.test import Client, TestCase, override_settings
+
+from core import metrics
+from posts.models import Post, User
+
+
+def counter(name, **labels):
+    key = (name, tuple(sorted(labels.items())))
+    return metrics.registry.counters.get(key, 0)
+
+
+class MetricsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_view_latency_and_cache_metrics(self):
+        """/metrics отдаёт задержки по имени адреса и чтения кэша."""
+        self.guest_client.get('/')
+        text = self.guest_client.get('/metrics/').content.decode()
+        self.assertIn('# TYPE yatube_view_latency_seconds histogram', text)
+        self.assertIn(
+            'yatube_view_latency_seconds_bucket{view="posts:index",le="+Inf"}',
+            text,
+        )
+        self.assertIn('cache="index_page"', text)
+        self.assertIn('yatube_db_queries_total{alias="default"}', text)
+
+    def test_created_objects_counted(self):
+        """Создание поста увеличивает счётчик созданных постов."""
+        before = counter('yatube_posts_created_total')
+        Post.objects.create(text='Текст', author=MetricsTest.user)
+        self.assertEqual(counter('yatube_posts_created_total'), before + 1)
+
+    def test_snapshots_of_workers_are_summed(self):
+        """В режиме нескольких процессов складываются снимки всех."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        other = {
+            'counters': [['yatube_posts_created_total', {}, 1000]],
+            'histograms': [],
+        }
+        with open(os.path.join(directory, '1.json'), 'w') as snapshot:
+            json.dump(other, snapshot)
+        own = counter('yatube_posts_created_total')
+        with override_settings(METRICS_DIR=directory):
+            metrics.flush()
+            text = metrics.collect()
+        self.assertTrue(
+            os.path.exists(os.path.join(directory, f'{os.getpid()}.json'))
+        )
+        self.assertIn(f'yatube_posts_created_total {own + 1000:g}', text)
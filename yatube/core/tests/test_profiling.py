@@ -0,0 +1,64 @@
+from django.core.exceptions import MiddlewareNotUsed
+from django.test import Client, TestCase, override_settings
+
+from core.profiling import (
+    SIMILAR_QUERIES_THRESHOLD, Profile, ProfilingMiddleware,
+)
+from posts.models import User
+
+
+class ProfilingMiddlewareTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_user(username='Staff', is_staff=True)
+        cls.user = User.objects.create_user(username='User')
+
+    @override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=1.0)
+    def test_enabled_adds_server_timing(self):
+        """Включённое профилирование добавляет заголовок Server-Timing."""
+        with self.assertLogs('core.profiling', 'INFO') as logs:
+            response = Client().get('/')
+        timing = response['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('desc="posts/index.html"', timing)
+        self.assertIn('cache;desc=', timing)
+        self.assertIn('"path": "/"', logs.output[0])
+
+    @override_settings(
+        PROFILING_ENABLED=False, PROFILING_HEADER='HTTP_X_PROFILE',
+        DEBUG=False,
+    )
+    def test_header_only_for_staff(self):
+        """Заголовок X-Profile работает только для сотрудников."""
+        client = Client()
+        client.force_login(ProfilingMiddlewareTest.user)
+        response = client.get('/', HTTP_X_PROFILE='1')
+        self.assertFalse(response.has_header('Server-Timing'))
+        client.force_login(ProfilingMiddlewareTest.staff)
+        with self.assertLogs('core.profiling', 'INFO'):
+            response = client.get('/', HTTP_X_PROFILE='1')
+        self.assertTrue(response.has_header('Server-Timing'))
+
+    @override_settings(PROFILING_ENABLED=False, PROFILING_HEADER=None)
+    def test_disabled_by_default(self):
+        """Без настройки и заголовка middleware не подключается."""
+        with self.assertRaises(MiddlewareNotUsed):
+            ProfilingMiddleware(lambda request: None)
+        client = Client()
+        client.force_login(ProfilingMiddlewareTest.staff)
+        response = client.get('/', HTTP_X_PROFILE='1')
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_repeated_queries_detected(self):
+        """Повторы одного запроса считаются дубликатами и признаком N+1."""
+        profile = Profile()
+        profile.queries = [
+            ('SELECT 1 WHERE id = %s', repr((pk,)), 0.001)
+            for pk in range(SIMILAR_QUERIES_THRESHOLD)
+        ] + [('SELECT 2', '()', 0.001)] * 2
+        self.assertEqual(profile.duplicates(), 1)
+        self.assertEqual(
+            profile.similar(),
+            {'SELECT 1 WHERE id = %s': SIMILAR_QUERIES_THRESHOLD},
+        )
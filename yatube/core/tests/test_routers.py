@@ -0,0 +1,84 @@
+import os
+import tempfile
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.routers import REPLICA_STICKY_COOKIE, ReplicaRouter
+from posts.models import Post, User
+
+REPLICA = 'replica'
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class ReplicaRoutingTest(TestCase):
+    """Две базы SQLite: default и отдельный файл в роли реплики."""
+
+    databases = {'default', REPLICA}
+
+    @classmethod
+    def setUpClass(cls):
+        handle, cls.replica_path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        connections.databases[REPLICA] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': cls.replica_path,
+        }
+        call_command('migrate', database=REPLICA, verbosity=0)
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        Post.objects.create(text='Пост в основной базе', author=cls.user)
+        # Без сигналов: они писали бы ленты и счётчики в default
+        User.objects.using(REPLICA).bulk_create([
+            User(pk=cls.user.pk, username='TestUser'),
+        ])
+        Post.objects.using(REPLICA).bulk_create([
+            Post(text='Пост на реплике', author_id=cls.user.pk),
+        ])
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.databases[REPLICA]
+        os.remove(cls.replica_path)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ReplicaRoutingTest.user)
+
+    def test_feed_reads_from_replica(self):
+        """Лента читается с реплики, форма поста — из default."""
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Пост на реплике')
+        self.assertNotContains(response, 'Пост в основной базе')
+        response = self.authorized_client.get(reverse('posts:post_create'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(REPLICA_STICKY_COOKIE, response.cookies)
+
+    def test_write_pins_author_to_primary(self):
+        """После записи автор читает из default и видит свой пост."""
+        response = self.authorized_client.post(
+            reverse('posts:post_create'), data={'text': 'Свежий пост'}
+        )
+        self.assertIn(REPLICA_STICKY_COOKIE, response.cookies)
+        # Гость читает с отстающей реплики и кэширует её версию ленты
+        self.assertNotContains(
+            self.guest_client.get(reverse('posts:index')), 'Свежий пост'
+        )
+        self.assertContains(
+            self.authorized_client.get(reverse('posts:index')), 'Свежий пост'
+        )
+
+    def test_reads_outside_requests_use_default(self):
+        """Вне помеченных представлений чтение и запись идут в default."""
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Post))
+        post = Post.objects.using(REPLICA).get()
+        self.assertEqual(router.db_for_write(Post, instance=post), 'default')
@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase
+
+from core.testing import TEST_CACHES
+
+
+class TestRunnerTest(TestCase):
+    def test_tests_use_own_cache(self):
+        """Тесты идут на своём кэше в памяти, что бы ни задало окружение."""
+        self.assertEqual(settings.CACHES, TEST_CACHES)
+        self.assertIsInstance(caches['default'], LocMemCache)
@@ -1,7 +1,11 @@
 from http import HTTPStatus
 
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render
 
+from .health import run_checks
+from .metrics import collect
+
 
 def page_not_found(request, exception):
     return render(
@@ -24,3 +28,23 @@ def server_error(request):
     return render(
         request, 'core/500.html', status=HTTPStatus.INTERNAL_SERVER_ERROR.value
     )
+
+
+def health(request):
+    """Состояние зависимостей для балансировщика и мониторинга."""
+    checks = run_checks()
+    healthy = all(checks.values())
+    return JsonResponse(
+        {'status': 'ok' if healthy else 'fail', 'checks': checks},
+        status=(
+            HTTPStatus.OK.value if healthy
+            else HTTPStatus.SERVICE_UNAVAILABLE.value
+        ),
+    )
+
+
+def metrics(request):
+    """Метрики всех воркеров в текстовом формате Prometheus."""
+    return HttpResponse(
+        collect(), content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -1,7 +1,31 @@
 from django.contrib import admin
+from django.http import StreamingHttpResponse
 
+from . import exporting, search
 from .models import Comment, Follow, Group, Post
 
+CONTENT_TYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+def export_action(file_format):
+    """Действие админки: выбранные строки потоком в файл file_format."""
+    def export(modeladmin, request, queryset):
+        name = exporting.export_name(queryset.model)
+        response = StreamingHttpResponse(
+            exporting.export_lines(name, file_format, queryset),
+            content_type=f'{CONTENT_TYPES[file_format]}; charset=utf-8',
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{name}.{file_format}"'
+        )
+        return response
+    export.__name__ = f'export_{file_format}'
+    export.short_description = f'Выгрузить в {file_format.upper()}'
+    return export
+
+
+EXPORT_ACTIONS = [export_action(name) for name in exporting.EXPORT_FORMATS]
+
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
@@ -17,6 +41,13 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
+    actions = EXPORT_ACTIONS
+
+    def get_search_results(self, request, queryset, search_term):
+        # Вместо LIKE '%…%' по всей таблице ищем через поисковый индекс
+        if not search_term:
+            return queryset, False
+        return search.get_backend().filter(queryset, search_term), False
 
 
 @admin.register(Group)
@@ -38,6 +69,7 @@ class CommentAdmin(admin.ModelAdmin):
         'author',
         'pub_date',
     )
+    actions = EXPORT_ACTIONS
 
 
 @admin.register(Follow)
@@ -47,3 +79,4 @@ class FollowAdmin(admin.ModelAdmin):
         'user',
         'author',
     )
+    actions = EXPORT_ACTIONS
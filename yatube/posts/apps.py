@@ -1,5 +1,15 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from . import caching, search, signals  # noqa: F401
+
+        checks.register(
+            caching.check_shared_cache, checks.Tags.caches, deploy=True
+        )
+        # Неверный POSTS_SEARCH_BACKEND падает при запуске, а не в запросе
+        search.get_backend()
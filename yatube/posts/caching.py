@@ -0,0 +1,201 @@
+"""
+Версионированный кэш отрендеренных лент и страниц постов.
+
+Ключ фрагмента включает счётчики версий ленты (главная, группа, автор)
+или поста. Запись поста или комментария увеличивает нужные счётчики,
+поэтому старые фрагменты больше не читаются и просто вытесняются из кэша.
+Те же версии и время последнего сброса служат валидаторами ETag и
+Last-Modified для условных GET-запросов.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from core import routers
+
+# Таймаут нужен только для вытеснения: устаревание решают версии
+FEED_CACHE_TIMEOUT: int = 60 * 60 * 24
+# Кэши, которые видит только свой процесс: версии, поднятые одним
+# воркером, другие не увидят и сутки будут отдавать старые фрагменты
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_process_local(alias='default'):
+    """Виден ли кэш alias только текущему процессу."""
+    return settings.CACHES[alias]['BACKEND'] in PROCESS_LOCAL_CACHES
+
+
+def check_shared_cache(app_configs, **kwargs):
+    """Проверка check --deploy: версии должны быть общими для воркеров."""
+    if not is_process_local():
+        return []
+    return [checks.Warning(
+        'Кэш по умолчанию виден только своему процессу: при нескольких '
+        'воркерах страницы и ETag расходятся, а миниатюры от '
+        'thumbnail_worker не доходят до сайта.',
+        hint='Задайте общий CACHE_BACKEND: file, memcached, redis или db.',
+        id='posts.W001',
+    )]
+
+
+def _version_key(namespace, pk=None):
+    if pk is None:
+        return f'posts:version:{namespace}'
+    return f'posts:version:{namespace}:{pk}'
+
+
+def _modified_key(namespace, pk=None):
+    return _version_key(namespace, pk).replace(':version:', ':modified:', 1)
+
+
+def _initial_version():
+    # Счётчик, вытесненный из кэша, не должен вернуться к старому значению
+    return time.time_ns()
+
+
+def _add_missing(found, keys, initial):
+    """Заводит в кэше ключи, которых нет в found, значениями initial()."""
+    for key in keys:
+        if key not in found:
+            value = initial()
+            cache.add(key, value, None)
+            # Кэш, который ничего не хранит (DummyCache), вернёт value
+            found[key] = cache.get(key, value)
+
+
+def get_state(*namespaces):
+    """
+    Версии и время последнего изменения за одно обращение к кэшу.
+
+    Пропавшее из кэша время изменения считается текущим: лучше лишний
+    раз отдать страницу целиком, чем ответить 304 на изменённую.
+    """
+    version_keys = [_version_key(*namespace) for namespace in namespaces]
+    modified_keys = [_modified_key(*namespace) for namespace in namespaces]
+    found = cache.get_many(version_keys + modified_keys)
+    _add_missing(found, version_keys, _initial_version)
+    _add_missing(found, modified_keys, time.time)
+    return (
+        [found[key] for key in version_keys],
+        [found[key] for key in modified_keys],
+    )
+
+
+def get_versions(*namespaces):
+    """Текущие версии пространств имён за одно обращение к кэшу."""
+    return get_state(*namespaces)[0]
+
+
+def bump_version(namespace, pk=None):
+    """Делает устаревшими все фрагменты пространства имён."""
+    key = _version_key(namespace, pk)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), None)
+    cache.set(_modified_key(namespace, pk), time.time(), None)
+
+
+def invalidate(*namespaces):
+    """Сбрасывает версии сейчас и ещё раз после коммита транзакции."""
+    def bump():
+        for namespace in namespaces:
+            bump_version(*namespace)
+    bump()
+    # Запрос, прочитавший данные до коммита, мог сохранить старый
+    # фрагмент уже под новой версией; повторный сброс его отбрасывает
+    transaction.on_commit(bump)
+
+
+def invalidate_post(post, old_group_id=None):
+    """Инвалидирует всё, где виден пост: ленты и страницу поста."""
+    namespaces = [('index',), ('author', post.author_id), ('post', post.pk)]
+    for group_id in {post.group_id, old_group_id} - {None}:
+        namespaces.append(('group', group_id))
+    invalidate(*namespaces)
+
+
+def fragment_context(*namespaces):
+    """Контекст для тега {% cache %}: таймаут и строка версий."""
+    versions, modified = get_state(*namespaces)
+    context = {
+        'timeout': FEED_CACHE_TIMEOUT,
+        'version': '-'.join(
+            _version_key(*namespace) + f':{version}'
+            for namespace, version in zip(namespaces, versions)
+        ),
+    }
+    recent = time.time() - max(modified) < settings.REPLICA_STICKY_SECONDS
+    if routers.reads_from_replica() and recent:
+        # Реплика могла ещё не получить недавнюю запись: такой фрагмент
+        # живёт недолго и не достаётся тем, кто читает из default
+        context['timeout'] = settings.REPLICA_STICKY_SECONDS
+        context['version'] += ':replica'
+    return context
+
+
+def validators(*namespaces):
+    """ETag и время изменения (unix-время) по версиям из кэша."""
+    versions, modified = get_state(*namespaces)
+    # Версия ключей кэша меняется при выкладке новых шаблонов
+    state = '-'.join(map(str, [cache.version, *versions]))
+    return quote_etag(hashlib.md5(state.encode()).hexdigest()), max(modified)
+
+
+class ConditionalResponse(Exception):
+    """Готовый ответ на условный запрос: 304 или 412."""
+
+    def __init__(self, response):
+        super().__init__(response.status_code)
+        self.response = response
+
+
+def validate(request, *namespaces):
+    """
+    Проверяет условный GET гостя по версиям страницы.
+
+    Вызывается до выборки постов и отрисовки шаблона. Если у клиента
+    актуальная версия, бросает ConditionalResponse с ответом 304, иначе
+    запоминает валидаторы для заголовков ответа. Страницы вошедших
+    пользователей зависят от подписок и CSRF-токена и не проверяются.
+    """
+    if request.method not in ('GET', 'HEAD') or request.user.is_authenticated:
+        return
+    etag, modified = validators(*namespaces)
+    last_modified = int(modified)
+    request.page_validators = (etag, last_modified)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is not None:
+        raise ConditionalResponse(response)
+
+
+def conditional(view):
+    """Отвечает на условный GET и ставит ETag и Last-Modified из validate."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            response = view(request, *args, **kwargs)
+        except ConditionalResponse as conditional_response:
+            response = conditional_response.response
+        page_validators = getattr(request, 'page_validators', None)
+        if page_validators and response.status_code in (200, 304):
+            etag, last_modified = page_validators
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            # Без no-cache браузер счёл бы страницу свежей по
+            # Last-Modified и не спрашивал бы сервер вовсе
+            patch_cache_control(response, no_cache=True)
+        return response
+    return wrapper
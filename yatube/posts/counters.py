@@ -0,0 +1,117 @@
+"""
+Денормализованные счётчики постов, комментариев и подписок.
+
+Счётчики меняются атомарными UPDATE с F()-выражениями из сигналов
+сохранения и удаления; расхождения исправляет команда reconcile_counters.
+Разошедшийся счётчик не уходит ниже нуля: иначе удаление объекта упало
+бы на ограничении PositiveIntegerField.
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Post, User, UserStats
+
+# Какой счётчик пользователя считается по какой модели и полю
+USER_COUNTERS = {
+    'posts_count': (Post, 'author'),
+    'followers_count': (Follow, 'author'),
+    'following_count': (Follow, 'user'),
+}
+
+
+def _count_subquery(model, field, outer_field):
+    """Коррелированный COUNT(*) по строкам model, где field = outer_field."""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef(outer_field)})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+def recount_user(user_id):
+    """Пересчитывает счётчики одного пользователя с нуля."""
+    values = {
+        counter: model.objects.filter(**{field: user_id}).count()
+        for counter, (model, field) in USER_COUNTERS.items()
+    }
+    stats, _ = UserStats.objects.update_or_create(
+        user_id=user_id, defaults=values
+    )
+    return stats
+
+
+def _changed(counter, delta):
+    """Значение счётчика после изменения на delta, но не меньше нуля."""
+    if delta >= 0:
+        return F(counter) + delta
+    return Greatest(F(counter) + delta, 0)
+
+
+def change_user_counter(user_id, counter, delta):
+    """
+    Атомарно меняет счётчик пользователя на delta.
+
+    Если строки счётчиков нет, её позже целиком посчитает stats_for.
+    """
+    UserStats.objects.filter(user_id=user_id).update(
+        **{counter: _changed(counter, delta)}
+    )
+
+
+def change_comments_counter(post_id, delta):
+    """Атомарно меняет счётчик комментариев поста на delta."""
+    Post.objects.filter(pk=post_id).update(
+        comments_count=_changed('comments_count', delta)
+    )
+
+
+def stats_for(user):
+    """Счётчики пользователя; создаёт их, если строки ещё нет."""
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        return recount_user(user.pk)
+
+
+def reconcile(dry_run=False):
+    """
+    Сверяет все счётчики с фактическими данными и исправляет расхождения.
+
+    Возвращает словарь «счётчик: число исправленных строк».
+    """
+    missing = User.objects.filter(stats__isnull=True).values_list(
+        'pk', flat=True
+    )
+    drift = {'missing_stats': missing.count()}
+    if not dry_run:
+        # Размер пачки выбирает бэкенд: в SQLite в одном INSERT
+        # не больше 500 строк (SQLITE_MAX_COMPOUND_SELECT)
+        UserStats.objects.bulk_create(
+            [UserStats(user_id=pk) for pk in missing.iterator()],
+            ignore_conflicts=True,
+        )
+    for counter, (model, field) in USER_COUNTERS.items():
+        actual = _count_subquery(model, field, 'user')
+        drifted = UserStats.objects.annotate(actual=actual).exclude(
+            **{counter: F('actual')}
+        )
+        drift[counter] = drifted.count()
+        if drift[counter] and not dry_run:
+            UserStats.objects.filter(
+                pk__in=drifted.values('pk')
+            ).update(**{counter: actual})
+    actual = _count_subquery(Comment, 'post', 'pk')
+    drifted = Post.objects.annotate(actual=actual).exclude(
+        comments_count=F('actual')
+    )
+    drift['comments_count'] = drifted.count()
+    if drift['comments_count'] and not dry_run:
+        Post.objects.filter(pk__in=drifted.values('pk')).update(
+            comments_count=actual
+        )
+    return drift
@@ -0,0 +1,82 @@
+"""
+Подписки на авторов одним SQL-запросом.
+
+follow и unfollow идемпотентны: повторный или одновременный вызов не
+падает на ограничении unique_follow и не меняет счётчики дважды.
+Подписка — INSERT … ON CONFLICT DO NOTHING (в SQLite — INSERT OR
+IGNORE), отписка — один DELETE. Число затронутых строк показывает,
+изменилось ли что-то, и только тогда меняются счётчики и лента.
+"""
+from django.db import connections, router, transaction
+
+from core import metrics
+
+from . import caching, counters, timeline
+from .models import Follow
+
+
+def followed(user_id, author_id):
+    """Счётчики, лента, кэш профилей и метрика после новой подписки."""
+    counters.change_user_counter(author_id, 'followers_count', 1)
+    counters.change_user_counter(user_id, 'following_count', 1)
+    timeline.backfill(user_id, author_id)
+    # Счётчики подписок видны на страницах обоих профилей
+    caching.invalidate(('author', author_id), ('author', user_id))
+    metrics.inc('yatube_follows_created_total')
+
+
+def unfollowed(user_id, author_id):
+    """Счётчики, лента и кэш профилей после отписки."""
+    counters.change_user_counter(author_id, 'followers_count', -1)
+    counters.change_user_counter(user_id, 'following_count', -1)
+    timeline.remove_author(user_id, author_id)
+    timeline.follower_lost(author_id)
+    caching.invalidate(('author', author_id), ('author', user_id))
+
+
+def _execute(alias, sql, params):
+    """Выполняет запрос к таблице подписок; возвращает число строк."""
+    connection = connections[alias]
+    quote = connection.ops.quote_name
+    sql = sql.format(
+        table=quote(Follow._meta.db_table),
+        user=quote(Follow._meta.get_field('user').column),
+        author=quote(Follow._meta.get_field('author').column),
+        insert=connection.ops.insert_statement(ignore_conflicts=True),
+        suffix=connection.ops.ignore_conflicts_suffix_sql(
+            ignore_conflicts=True
+        ),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def follow(user, author):
+    """Подписывает user на author. True, если подписка появилась сейчас."""
+    if user.pk == author.pk:
+        return False
+    alias = router.db_for_write(Follow)
+    with transaction.atomic(using=alias, savepoint=False):
+        inserted = _execute(
+            alias,
+            '{insert} {table} ({user}, {author}) VALUES (%s, %s){suffix}',
+            [user.pk, author.pk],
+        )
+        if inserted:
+            followed(user.pk, author.pk)
+    return bool(inserted)
+
+
+def unfollow(user, author):
+    """Отписывает user от author. True, если подписка была."""
+    alias = router.db_for_write(Follow)
+    with transaction.atomic(using=alias, savepoint=False):
+        deleted = _execute(
+            alias,
+            'DELETE FROM {table} WHERE {user} = %s AND {author} = %s',
+            [user.pk, author.pk],
+        )
+        if deleted:
+            unfollowed(user.pk, author.pk)
+    return bool(deleted)
@@ -0,0 +1,233 @@
+"""
+Массовый импорт постов и комментариев из NDJSON.
+
+Формат строк тот же, что у выгрузки (posts.exporting): автор — имя
+пользователя, группа — slug, пост комментария — id. Авторы и группы
+загружаются в словари один раз до начала импорта, строки вставляются
+bulk_create пачками, каждая в своей транзакции. После каждой пачки в
+файл контрольной точки пишется смещение в исходном файле: прерванный
+импорт продолжается с него. Строки с id вставляются с этим id и
+пропускаются (считаются в skipped), если такой уже есть, поэтому повтор
+последней пачки после сбоя не создаёт дублей; для строк без id повтор
+возможен.
+"""
+import gzip
+import json
+import os
+import time
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import thumbnails
+from .models import Comment, Group, Post, User
+from .seeding import explicit_pub_date, rebuild_derived
+
+IMPORT_BATCH_SIZE: int = 1000  # Строк в одной пачке bulk_create
+IMPORT_MODELS = {'posts': Post, 'comments': Comment}
+
+
+def load_checkpoint(path):
+    """Состояние прерванного импорта или начальное, если файла нет."""
+    state = {
+        'offset': 0, 'line': 0, 'imported': 0, 'skipped': 0, 'errors': 0,
+    }
+    if path and os.path.exists(path):
+        with open(path, encoding='utf-8') as file:
+            state.update(json.load(file))
+    return state
+
+
+def save_checkpoint(path, state):
+    # Через временный файл: сбой во время записи не портит точку
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as file:
+        json.dump(state, file)
+    os.replace(temporary, path)
+
+
+def read_lines(path, offset=0):
+    """Строки файла начиная со смещения offset и смещение после каждой."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as file:
+        file.seek(offset)
+        for line in iter(file.readline, b''):
+            offset += len(line)
+            yield offset, line
+
+
+def _pub_date(value):
+    if not value:
+        return timezone.now()
+    moment = parse_datetime(value)
+    if moment is None:
+        raise ValueError(f'неверная дата {value!r}')
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, timezone.utc)
+    return moment
+
+
+def _lookup(mapping, value, what):
+    try:
+        return mapping[value]
+    except KeyError:
+        raise ValueError(f'{what} {value!r} не найден') from None
+
+
+def _pk(row):
+    pk = row.get('id')
+    if pk is not None and not isinstance(pk, int):
+        raise ValueError(f'неверный id {pk!r}')
+    return pk
+
+
+def build_post(row, lookups):
+    if not row.get('text'):
+        raise ValueError('пустой текст')
+    group = row.get('group')
+    return Post(
+        pk=_pk(row),
+        text=row['text'],
+        pub_date=_pub_date(row.get('pub_date')),
+        author_id=_lookup(lookups['authors'], row.get('author'), 'автор'),
+        group_id=_lookup(lookups['groups'], group, 'группа') if group
+        else None,
+        image=row.get('image') or '',
+    )
+
+
+def build_comment(row, lookups):
+    if not row.get('text'):
+        raise ValueError('пустой текст')
+    if not isinstance(row.get('post'), int):
+        raise ValueError('не указан id поста')
+    return Comment(
+        pk=_pk(row),
+        text=row['text'],
+        pub_date=_pub_date(row.get('pub_date')),
+        author_id=_lookup(lookups['authors'], row.get('author'), 'автор'),
+        post_id=row['post'],
+    )
+
+
+BUILDERS = {'posts': build_post, 'comments': build_comment}
+
+
+def _report_error(state, error, line, message):
+    state['errors'] += 1
+    if error:
+        error(f'строка {line}: {message}')
+
+
+def _drop_orphans(batch, state, error):
+    """Комментарии пачки без поста в базе уходят в ошибки."""
+    post_ids = {comment.post_id for _, comment in batch}
+    existing = set(
+        Post.objects.filter(pk__in=post_ids).values_list('pk', flat=True)
+    )
+    for line, comment in batch:
+        if comment.post_id not in existing:
+            _report_error(
+                state, error, line, f'пост {comment.post_id} не найден'
+            )
+    return [
+        (line, comment) for line, comment in batch
+        if comment.post_id in existing
+    ]
+
+
+def _drop_existing(model, batch, state):
+    """Объекты пачки, чьих id ещё нет в базе; остальные — в skipped."""
+    pks = {obj.pk for _, obj in batch if obj.pk is not None}
+    existing = set(
+        model.objects.filter(pk__in=pks).values_list('pk', flat=True)
+    ) if pks else set()
+    objects = [obj for _, obj in batch if obj.pk not in existing]
+    state['skipped'] += len(batch) - len(objects)
+    return objects
+
+
+def _read_batches(path, build, lookups, state, batch_size, error):
+    """
+    Пачки пар (номер строки, объект) из файла со смещения state.
+
+    Вместе с пачкой отдаётся смещение после её последней строки;
+    плохие строки передаются в error и в пачки не попадают.
+    """
+    batch, offset = [], state['offset']
+    for offset, line in read_lines(path, state['offset']):
+        state['line'] += 1
+        if not line.strip():
+            continue
+        try:
+            obj = build(json.loads(line), lookups)
+        except (ValueError, TypeError, AttributeError) as problem:
+            _report_error(state, error, state['line'], problem)
+        else:
+            batch.append((state['line'], obj))
+        if len(batch) >= batch_size:
+            yield batch, offset
+            batch = []
+    yield batch, offset
+
+
+def _flush(model, batch, offset, state, error):
+    """Вставляет пачку в одной транзакции и сдвигает состояние."""
+    if model is Comment and batch:
+        batch = _drop_orphans(batch, state, error)
+    with transaction.atomic():
+        objects = _drop_existing(model, batch, state)
+        # ignore_conflicts — на случай id, вставленного одновременно
+        model.objects.bulk_create(objects, ignore_conflicts=True)
+        if model is Post:
+            thumbnails.enqueue(*{
+                post.image.name for post in objects if post.image
+            })
+    state['offset'] = offset
+    state['imported'] += len(objects)
+
+
+def _progress(state, imported, started):
+    elapsed = max(time.monotonic() - started, 1e-9)
+    return (
+        f'строк: {state["line"]}, импортировано: {state["imported"]}, '
+        f'пропущено: {state["skipped"]}, ошибок: {state["errors"]}, '
+        f'{imported / elapsed:.0f} в секунду'
+    )
+
+
+def import_file(name, path, batch_size=IMPORT_BATCH_SIZE, checkpoint=None,
+                log=None, error=None):
+    """
+    Импортирует строки NDJSON из path в модель выгрузки name.
+
+    Возвращает состояние импорта: число прочитанных строк, вставленных
+    объектов, пропущенных (их id уже есть в базе) и ошибок. Плохие
+    строки пропускаются и передаются в error.
+    """
+    model, build = IMPORT_MODELS[name], BUILDERS[name]
+    state = load_checkpoint(checkpoint)
+    lookups = {
+        'authors': dict(User.objects.values_list('username', 'pk')),
+        'groups': dict(Group.objects.values_list('slug', 'pk')),
+    }
+    started = time.monotonic()
+    imported_at_start = state['imported']
+    batches = _read_batches(path, build, lookups, state, batch_size, error)
+    with explicit_pub_date(model):
+        for batch, offset in batches:
+            _flush(model, batch, offset, state, error)
+            if checkpoint:
+                save_checkpoint(checkpoint, state)
+            if log:
+                log(_progress(
+                    state, state['imported'] - imported_at_start, started
+                ))
+    # Строки с явным id не двигают последовательности PostgreSQL
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), [model]):
+            cursor.execute(sql)
+    rebuild_derived()
+    return state
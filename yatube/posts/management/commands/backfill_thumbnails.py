@@ -0,0 +1,53 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Строит миниатюры картинок всех постов параллельно'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Сколько миниатюр строить одновременно',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='По сколько картинок читать из базы за раз',
+        )
+
+    def handle(self, *args, **options):
+        thumbnails.require_shared_cache()
+        names = (
+            Post.objects.exclude(image='')
+            .order_by()
+            .values_list('image', flat=True)
+            .distinct()
+            .iterator(chunk_size=options['chunk_size'])
+        )
+        done = failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            # Отдаём пулу по пачке, чтобы не держать в памяти все имена
+            while True:
+                chunk = list(islice(names, options['chunk_size']))
+                if not chunk:
+                    break
+                generated = list(
+                    pool.map(thumbnails.generate_in_thread, chunk)
+                )
+                done += sum(generated)
+                failed += len(generated) - sum(generated)
+                thumbnails.refresh_pages(
+                    [name for name, ok in zip(chunk, generated) if ok]
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {done}, без миниатюр: {failed}'
+        ))
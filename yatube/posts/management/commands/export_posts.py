@@ -0,0 +1,58 @@
+import gzip
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import exporting
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты, комментарии или подписки в NDJSON или CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            choices=list(exporting.EXPORTS),
+            default='posts',
+            help='Что выгружать',
+        )
+        parser.add_argument(
+            '--format',
+            choices=exporting.EXPORT_FORMATS,
+            default='ndjson',
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл выгрузки; без него строки идут в stdout',
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Сжать файл gzip (включается и для имени на .gz)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=exporting.EXPORT_CHUNK_SIZE,
+            help='Строк, читаемых из базы за один раз',
+        )
+
+    def handle(self, *args, **options):
+        output = options['output']
+        compress = options['gzip'] or bool(output and output.endswith('.gz'))
+        if compress and not output:
+            raise CommandError('Для сжатой выгрузки укажите --output')
+        lines = exporting.export_lines(
+            options['model'],
+            options['format'],
+            chunk_size=options['chunk_size'],
+        )
+        if not output:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        opener = gzip.open if compress else open
+        with opener(output, 'wt', encoding='utf-8', newline='') as stream:
+            count = 0
+            for count, line in enumerate(lines, 1):
+                stream.write(line)
+        self.stderr.write(self.style.SUCCESS(f'Записано строк: {count}'))
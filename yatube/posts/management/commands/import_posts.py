@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import importing
+
+
+class Command(BaseCommand):
+    help = 'Импортирует посты или комментарии из файла NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл NDJSON, можно сжатый .gz')
+        parser.add_argument(
+            '--model',
+            choices=list(importing.IMPORT_MODELS),
+            default='posts',
+            help='Что импортировать',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=importing.IMPORT_BATCH_SIZE,
+            help='Строк в одной пачке (и одной транзакции)',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл контрольной точки: с неё продолжается '
+                 'прерванный импорт',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        state = importing.import_file(
+            options['model'],
+            options['path'],
+            batch_size=options['batch_size'],
+            checkpoint=options['checkpoint'],
+            log=lambda message: self.stdout.write(
+                f'{time.monotonic() - started:8.1f}s {message}'
+            ),
+            error=lambda message: self.stderr.write(message),
+        )
+        style = self.style.WARNING if state['errors'] else self.style.SUCCESS
+        self.stdout.write(style(
+            f'Импортировано: {state["imported"]}, '
+            f'пропущено: {state["skipped"]}, ошибок: {state["errors"]}'
+        ))
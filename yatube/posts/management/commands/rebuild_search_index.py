@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Заново строит поисковый индекс постов и комментариев'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            search.get_backend().rebuild()
+        self.stdout.write(self.style.SUCCESS('Поисковый индекс перестроен'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = 'Сверяет денормализованные счётчики с данными и исправляет их'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать расхождения, ничего не меняя',
+        )
+
+    def handle(self, *args, **options):
+        drift = counters.reconcile(dry_run=options['dry_run'])
+        for counter, rows in drift.items():
+            self.stdout.write(f'{counter}: {rows}')
+        if options['dry_run']:
+            self.stdout.write('Изменения не сохранены (--dry-run)')
+        else:
+            self.stdout.write(self.style.SUCCESS('Счётчики сверены'))
@@ -0,0 +1,81 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import seeding
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = 'Заполняет базу большим объёмом данных для нагрузочных проверок'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=50000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument(
+            '--follows',
+            type=int,
+            default=20,
+            help='Сколько в среднем авторов читает пользователь',
+        )
+        parser.add_argument(
+            '--images',
+            type=float,
+            default=0.1,
+            help='Доля постов с картинкой-заглушкой',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='За сколько дней назад распределить даты публикации',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--prefix',
+            default='seed',
+            help='Префикс имён созданных пользователей и групп',
+        )
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=1,
+            help='Сколько процессов генерируют пачки; вставляет их '
+                 'одно подключение',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=seeding.SEED_BATCH_SIZE,
+            help='Строк в одной пачке',
+        )
+
+    def handle(self, *args, **options):
+        prefix = f'{options["prefix"]}{options["seed"]}_'
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(
+                f'Пользователи {prefix}* уже есть: смените --seed или --prefix'
+            )
+        started = time.monotonic()
+        created = seeding.seed_database(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follows=options['follows'],
+            image_ratio=options['images'],
+            days=options['days'],
+            seed=options['seed'],
+            prefix=options['prefix'],
+            processes=options['processes'],
+            batch_size=options['batch_size'],
+            log=lambda message: self.stdout.write(
+                f'{time.monotonic() - started:8.1f}s {message}'
+            ),
+        )
+        summary = ', '.join(
+            f'{name}: {count}' for name, count in created.items()
+        )
+        self.stdout.write(self.style.SUCCESS(f'Создано — {summary}'))
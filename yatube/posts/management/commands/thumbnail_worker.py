@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Фоновый обработчик очереди миниатюр'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Сколько миниатюр строить одновременно',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Сколько заданий забирать из очереди за раз',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Пауза в секундах, когда очередь пуста',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Разобрать очередь и завершиться (для cron)',
+        )
+
+    def handle(self, *args, **options):
+        thumbnails.require_shared_cache()
+        while True:
+            done = thumbnails.process_jobs(
+                limit=options['batch_size'], workers=options['workers']
+            )
+            if done:
+                self.stdout.write(f'Обработано заданий: {done}')
+                continue
+            if options['once']:
+                return
+            time.sleep(options['interval'])
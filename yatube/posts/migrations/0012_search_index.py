@@ -0,0 +1,37 @@
+from django.db import migrations
+
+CREATE_SQL = (
+    "CREATE VIRTUAL TABLE posts_search USING fts5("
+    "text, post_id UNINDEXED, tokenize='unicode61 remove_diacritics 2')"
+)
+FILL_SQL = (
+    'INSERT INTO posts_search (rowid, text, post_id) '
+    'SELECT 2 * id, text, id FROM posts_post',
+    'INSERT INTO posts_search (rowid, text, post_id) '
+    'SELECT 2 * id + 1, text, post_id FROM posts_comment',
+)
+
+
+def create_search_index(apps, schema_editor):
+    """Индекс FTS5 есть только у SQLite; другие движки ищут через LIKE."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(CREATE_SQL)
+    for sql in FILL_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS posts_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_thumbnailjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
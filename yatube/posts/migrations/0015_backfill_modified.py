@@ -0,0 +1,40 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:37
+
+from django.db import migrations, transaction
+from django.db.models import F, Max, Min
+
+# Строк в одной транзакции: короткие транзакции не держат блокировку
+# таблицы на всё время заполнения
+BACKFILL_BATCH_SIZE = 10000
+
+
+def backfill_modified(apps, schema_editor):
+    """Время изменения существующих постов и комментариев — их pub_date."""
+    alias = schema_editor.connection.alias
+    for model_name in ('Post', 'Comment'):
+        model = apps.get_model('posts', model_name)
+        bounds = model.objects.using(alias).aggregate(
+            first=Min('pk'), last=Max('pk')
+        )
+        if bounds['first'] is None:
+            continue
+        for start in range(
+            bounds['first'], bounds['last'] + 1, BACKFILL_BATCH_SIZE
+        ):
+            with transaction.atomic(using=alias):
+                model.objects.using(alias).filter(
+                    pk__gte=start, pk__lt=start + BACKFILL_BATCH_SIZE
+                ).update(modified=F('pub_date'))
+
+
+class Migration(migrations.Migration):
+    # Каждая пачка фиксируется сразу; повторный запуск безопасен
+    atomic = False
+
+    dependencies = [
+        ('posts', '0014_post_versions'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_modified, migrations.RunPython.noop),
+    ]
@@ -2,7 +2,7 @@ from django.contrib.auth import get_user_model
 from django.db import models
 from django.db.models.constraints import UniqueConstraint
 
-from core.models import CreatedModel
+from core.models import VersionedModel
 
 User = get_user_model()
 
@@ -33,7 +33,7 @@ class Group(models.Model):
         return self.title
 
 
-class Post(CreatedModel):
+class Post(VersionedModel):
     """Класс для создания постов."""
     text = models.TextField(
         verbose_name='Текст',
@@ -61,17 +61,34 @@ class Post(CreatedModel):
         upload_to='posts/',
         blank=True
     )
+    comments_count = models.PositiveIntegerField(
+        verbose_name='Количество комментариев',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
         ordering = ['-pub_date']
+        # Ленты группы и автора фильтруют по ним и сортируют по дате;
+        # id в конце — для постов с одинаковой датой
+        indexes = [
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_date_idx',
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_date_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
 
-class Comment(CreatedModel):
+class Comment(VersionedModel):
     """Модель комментариев"""
     post = models.ForeignKey(
         Post,
@@ -94,6 +111,12 @@ class Comment(CreatedModel):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['post', '-pub_date', '-id'],
+                name='comment_post_date_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -117,6 +140,90 @@ class Follow(models.Model):
     class Meta:
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
+        # Поиск подписки по (user, author) обслуживает индекс unique_follow,
+        # рассылке по подписчикам автора нужен обратный порядок полей
         constraints = [
             UniqueConstraint(fields=['user', 'author'], name='unique_follow')
         ]
+        indexes = [
+            models.Index(
+                fields=['author', 'user'], name='follow_author_user_idx'
+            ),
+        ]
+
+
+class UserStats(models.Model):
+    """Денормализованные счётчики пользователя"""
+    user = models.OneToOneField(
+        User,
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+    )
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Количество постов',
+        default=0,
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Количество подписчиков',
+        default=0,
+    )
+    following_count = models.PositiveIntegerField(
+        verbose_name='Количество подписок',
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+    def __str__(self):
+        return str(self.user_id)
+
+
+class TimelineEntry(models.Model):
+    """Материализованная лента подписок: пост в ленте пользователя"""
+    user = models.ForeignKey(
+        User,
+        verbose_name='Читатель',
+        on_delete=models.CASCADE,
+        related_name='timeline',
+    )
+    post = models.ForeignKey(
+        Post,
+        verbose_name='Пост',
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+    )
+    pub_date = models.DateTimeField('Дата публикации поста')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            UniqueConstraint(fields=['user', 'post'], name='unique_timeline')
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date'], name='timeline_user_date_idx'
+            ),
+        ]
+
+
+class ThumbnailJob(models.Model):
+    """Очередь генерации миниатюр для картинок постов"""
+    image = models.CharField(
+        'Картинка',
+        max_length=100,
+        unique=True,
+    )
+    created = models.DateTimeField('Поставлена в очередь', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Задание на миниатюры'
+        verbose_name_plural = 'Задания на миниатюры'
+        ordering = ['pk']
+
+    def __str__(self):
+        return self.image
@@ -0,0 +1,231 @@
+"""
+Полнотекстовый поиск по постам и комментариям.
+
+Текст постов и комментариев лежит в инвертированном индексе, который
+обновляется сигналами при сохранении и удалении. Бэкенд выбирается
+настройкой POSTS_SEARCH_BACKEND, по умолчанию — по движку базы:
+FTS5 для SQLite и медленный запасной вариант на LIKE для остальных.
+"""
+import re
+from abc import ABC, abstractmethod
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Comment, Post
+from .utils import feed_queryset
+
+FTS_TABLE = 'posts_search'
+
+# Слова запроса; всё остальное FTS5 принял бы за синтаксис
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(query):
+    return TOKEN_RE.findall(query or '')
+
+
+class BaseSearchBackend(ABC):
+    """
+    Интерфейс бэкенда поиска.
+
+    Обновлять индекс бэкенд может не уметь, а искать обязан: без
+    count, search и filter класс нельзя создать.
+    """
+
+    def index_post(self, post):
+        pass
+
+    def index_comment(self, comment):
+        pass
+
+    def remove_post(self, post_id):
+        pass
+
+    def remove_comment(self, comment_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+    @abstractmethod
+    def count(self, query):
+        """Сколько постов нашлось по запросу."""
+
+    @abstractmethod
+    def search(self, query, offset, limit):
+        """pk найденных постов, лучшие совпадения первыми."""
+
+    @abstractmethod
+    def filter(self, queryset, query):
+        """Сужает queryset постов до найденных, без ранжирования."""
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """
+    Индекс в виртуальной таблице FTS5.
+
+    Документ поста хранится под rowid 2 * pk, комментария — 2 * pk + 1,
+    поэтому обновление и удаление идут по rowid без поиска по таблице.
+    Ранг поста — лучший bm25 среди его текста и комментариев.
+    """
+
+    def _match(self, query):
+        return ' '.join(
+            '"{}"'.format(token.replace('"', '""'))
+            for token in tokenize(query)
+        )
+
+    def _replace(self, rowid, text, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [rowid]
+            )
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, text, post_id) '
+                f'VALUES (%s, %s, %s)',
+                [rowid, text, post_id],
+            )
+
+    def _delete(self, rowid):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [rowid]
+            )
+
+    def index_post(self, post):
+        self._replace(2 * post.pk, post.text, post.pk)
+
+    def index_comment(self, comment):
+        self._replace(2 * comment.pk + 1, comment.text, comment.post_id)
+
+    def remove_post(self, post_id):
+        self._delete(2 * post_id)
+
+    def remove_comment(self, comment_id):
+        self._delete(2 * comment_id + 1)
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, text, post_id) '
+                f'SELECT 2 * id, text, id FROM {Post._meta.db_table}'
+            )
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, text, post_id) '
+                f'SELECT 2 * id + 1, text, post_id '
+                f'FROM {Comment._meta.db_table}'
+            )
+
+    def _matching_sql(self):
+        return (
+            f'SELECT post_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+        )
+
+    def count(self, query):
+        match = self._match(query)
+        if not match:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(DISTINCT post_id) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s',
+                [match],
+            )
+            return cursor.fetchone()[0]
+
+    def search(self, query, offset, limit):
+        match = self._match(query)
+        if not match:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT post_id, MIN(rank) AS best FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s '
+                f'GROUP BY post_id ORDER BY best, post_id DESC '
+                f'LIMIT %s OFFSET %s',
+                [match, limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def filter(self, queryset, query):
+        match = self._match(query)
+        if not match:
+            return queryset.none()
+        return queryset.filter(pk__in=RawSQL(self._matching_sql(), [match]))
+
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    """
+    Поиск без индекса, через LIKE.
+
+    Годится для небольших баз на движках без подключённого индекса.
+    """
+
+    def _matching(self, query):
+        tokens = tokenize(query)
+        if not tokens:
+            return Post.objects.none()
+        posts = Post.objects.all()
+        for token in tokens:
+            posts = posts.filter(
+                Q(text__icontains=token) | Q(comments__text__icontains=token)
+            )
+        return posts.values('pk')
+
+    def count(self, query):
+        return self._matching(query).distinct().count()
+
+    def search(self, query, offset, limit):
+        return list(
+            self._matching(query)
+            .distinct()
+            .order_by('-pub_date', '-pk')
+            .values_list('pk', flat=True)[offset:offset + limit]
+        )
+
+    def filter(self, queryset, query):
+        return queryset.filter(pk__in=self._matching(query))
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    path = getattr(settings, 'POSTS_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    if connection.vendor == 'sqlite':
+        return SQLiteFTSBackend()
+    return DatabaseSearchBackend()
+
+
+class SearchResults:
+    """
+    Ленивый результат поиска для Paginator.
+
+    Считает и выбирает только запрошенную страницу, сохраняя порядок
+    ранжирования.
+    """
+
+    def __init__(self, query, backend=None):
+        self.query = query
+        self.backend = backend or get_backend()
+
+    def count(self):
+        return self.backend.count(self.query)
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        offset = item.start or 0
+        ids = self.backend.search(self.query, offset, item.stop - offset)
+        posts = feed_queryset().in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+def search(query):
+    return SearchResults(query)
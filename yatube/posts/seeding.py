@@ -0,0 +1,298 @@
+"""
+Массовое заполнение базы для нагрузочных окружений.
+
+Строки создаются bulk_create пачками, без сигналов, поэтому после
+вставки ленты подписок, счётчики и поисковый индекс перестраиваются
+целиком. Генерацию пачек можно раздать нескольким процессам, а
+вставляет их одно подключение: параллельные записи в SQLite падают
+с «database is locked». Содержимое каждой пачки зависит только от
+seed и её номера, так что результат воспроизводим при любом числе
+процессов.
+"""
+import io
+import multiprocessing
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from . import caching, counters, search, thumbnails, timeline
+from .models import Comment, Follow, Group, Post, User
+
+SEED_BATCH_SIZE: int = 5000  # Строк в одной пачке bulk_create
+ZIPF_EXPONENT: float = 1.1  # Крутизна степенного распределения авторов
+PLACEHOLDER_IMAGES: int = 16  # Разных картинок-заглушек на все посты
+
+# Общие для процессов данные: при fork наследуются без сериализации
+_state = {}
+
+
+def zipf_weights(count, exponent=ZIPF_EXPONENT):
+    """Накопленные веса Ципфа: первый элемент выбирается чаще всех."""
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)
+    ))
+
+
+def _rng(*parts):
+    # Строковый seed хешируется детерминированно, в отличие от hash()
+    return random.Random(':'.join(map(str, parts)))
+
+
+def _faker(seed):
+    from faker import Faker
+
+    faker = _state.get('faker')
+    if faker is None:
+        faker = _state['faker'] = Faker('ru_RU')
+    faker.seed_instance(seed)
+    return faker
+
+
+@contextmanager
+def explicit_pub_date(*models):
+    """Позволяет задать pub_date вручную вопреки auto_now_add."""
+    fields = [model._meta.get_field('pub_date') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _chunks(total, size):
+    return [
+        (start, min(start + size, total))
+        for start in range(0, total, size)
+    ]
+
+
+def _random_date(rng, days):
+    return _state['now'] - timedelta(seconds=rng.random() * days * 86400)
+
+
+def build_users(start, stop):
+    seed, prefix = _state['seed'], _state['prefix']
+    faker = _faker(f'{seed}:users:{start}')
+    return [
+        User(
+            username=f'{prefix}{index}',
+            first_name=faker.first_name(),
+            last_name=faker.last_name(),
+            password=_state['password'],
+        )
+        for index in range(start, stop)
+    ]
+
+
+def build_posts(start, stop):
+    seed = _state['seed']
+    rng = _rng(seed, 'posts', start)
+    faker = _faker(f'{seed}:posts:{start}')
+    users, weights = _state['users'], _state['weights']
+    groups, images = _state['groups'], _state['images']
+    authors = rng.choices(users, cum_weights=weights, k=stop - start)
+    return [
+        Post(
+            text=faker.paragraph(nb_sentences=3),
+            author_id=author_id,
+            group_id=rng.choice(groups),
+            pub_date=_random_date(rng, _state['days']),
+            image=(
+                rng.choice(images)
+                if images and rng.random() < _state['image_ratio'] else ''
+            ),
+        )
+        for author_id in authors
+    ]
+
+
+def build_comments(start, stop):
+    seed = _state['seed']
+    rng = _rng(seed, 'comments', start)
+    faker = _faker(f'{seed}:comments:{start}')
+    first_post, last_post = _state['posts']
+    users = _state['users']
+    return [
+        Comment(
+            text=faker.sentence(),
+            post_id=rng.randint(first_post, last_post),
+            author_id=rng.choice(users),
+            pub_date=_random_date(rng, _state['days']),
+        )
+        for _ in range(start, stop)
+    ]
+
+
+def build_follows(start, stop):
+    """Подписки читателей start..stop; популярных авторов читают чаще."""
+    rng = _rng(_state['seed'], 'follows', start)
+    users, weights = _state['users'], _state['weights']
+    average = _state['follows']
+    follows = []
+    for user_id in users[start:stop]:
+        authors = set(rng.choices(
+            users, cum_weights=weights, k=rng.randint(0, 2 * average)
+        ))
+        authors.discard(user_id)
+        follows.extend(
+            Follow(user_id=user_id, author_id=author_id)
+            for author_id in authors
+        )
+    return follows
+
+
+def _build_chunk(task):
+    function, start, stop = task
+    return function(start, stop)
+
+
+def _run(model, function, total, processes, batch_size,
+         ignore_conflicts=False):
+    """
+    Строит пачки function и вставляет их; возвращает число строк.
+
+    Процессы только генерируют строки, а пишет одно подключение:
+    параллельные писатели SQLite упирались бы в блокировку базы.
+    """
+    tasks = [
+        (function, start, stop) for start, stop in _chunks(total, batch_size)
+    ]
+    if processes > 1:
+        context = multiprocessing.get_context('fork')
+        pool = context.Pool(processes)
+        chunks = pool.imap(_build_chunk, tasks)
+    else:
+        pool = None
+        chunks = map(_build_chunk, tasks)
+    inserted = 0
+    try:
+        for rows in chunks:
+            with transaction.atomic():
+                model.objects.bulk_create(
+                    rows, ignore_conflicts=ignore_conflicts
+                )
+            inserted += len(rows)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return inserted
+
+
+def placeholder_images(count):
+    """Сохраняет картинки-заглушки в хранилище, возвращает их имена."""
+    from PIL import Image
+
+    names = []
+    for number in range(count):
+        name = f'posts/seed/placeholder_{number}.jpg'
+        if not default_storage.exists(name):
+            rng = _rng('image', number)
+            color = tuple(rng.randrange(256) for _ in range(3))
+            buffer = io.BytesIO()
+            Image.new('RGB', (960, 540), color).save(buffer, 'JPEG')
+            name = default_storage.save(name, ContentFile(buffer.getvalue()))
+        names.append(name)
+    return names
+
+
+def rebuild_derived():
+    """
+    Сверяет счётчики и перестраивает ленты и поисковый индекс.
+
+    Нужно после вставки bulk_create: сигналы при ней не срабатывают.
+    """
+    with transaction.atomic():
+        counters.reconcile()
+        timeline.rebuild()
+        search.get_backend().rebuild()
+    caching.invalidate(('index',))
+
+
+def seed_database(users, groups, posts, comments, follows, image_ratio=0.1,
+                  days=365, seed=0, prefix='seed', processes=1,
+                  batch_size=SEED_BATCH_SIZE, log=None):
+    """
+    Создаёт пользователей, группы, посты, комментарии и подписки.
+
+    Возвращает словарь «что создано: сколько».
+    """
+    def report(message):
+        if log:
+            log(message)
+
+    _state.update(
+        seed=seed,
+        prefix=f'{prefix}{seed}_',
+        password=make_password(None),
+        now=timezone.now(),
+        days=days,
+        follows=follows,
+        image_ratio=image_ratio,
+    )
+    created = {}
+    created['users'] = _run(User, build_users, users, processes, batch_size)
+    # Пачки вставляются по порядку, поэтому pk идут в порядке номеров
+    _state['users'] = list(
+        User.objects.filter(username__startswith=_state['prefix'])
+        .order_by('pk')
+        .values_list('pk', flat=True)
+    )
+    _state['weights'] = zipf_weights(len(_state['users']))
+    report(f'users: {created["users"]}')
+
+    Group.objects.bulk_create(
+        Group(
+            title=f'Группа {seed}-{index}',
+            slug=f'{prefix}-{seed}-{index}',
+            description='Группа для нагрузочного окружения',
+        )
+        for index in range(groups)
+    )
+    _state['groups'] = list(
+        Group.objects.filter(slug__startswith=f'{prefix}-{seed}-')
+        .values_list('pk', flat=True)
+    ) + [None]
+    created['groups'] = groups
+    _state['images'] = placeholder_images(PLACEHOLDER_IMAGES) if (
+        image_ratio > 0
+    ) else []
+
+    previous_post = Post.objects.aggregate(last=Max('pk'))['last'] or 0
+    with explicit_pub_date(Post, Comment):
+        created['posts'] = _run(
+            Post, build_posts, posts, processes, batch_size
+        )
+        report(f'posts: {created["posts"]}')
+        # Одна вставляющая сессия: новые pk идут подряд, но счётчик
+        # SQLite AUTOINCREMENT не переиспользует pk удалённых постов
+        bounds = Post.objects.filter(pk__gt=previous_post).aggregate(
+            first=Min('pk'), last=Max('pk')
+        )
+        _state['posts'] = (bounds['first'], bounds['last'])
+        if posts:
+            created['comments'] = _run(
+                Comment, build_comments, comments, processes, batch_size
+            )
+            report(f'comments: {created["comments"]}')
+    created['follows'] = _run(
+        Follow, build_follows, len(_state['users']), processes,
+        max(batch_size // max(follows, 1), 1), ignore_conflicts=True,
+    )
+    report(f'follows: {created["follows"]}')
+
+    if _state['images']:
+        thumbnails.enqueue(*_state['images'])
+    rebuild_derived()
+    report('counters, timelines and search index rebuilt')
+    return created
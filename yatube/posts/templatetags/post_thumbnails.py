@@ -0,0 +1,31 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def prefetch_thumbnails(posts):
+    """Одним обращением к кэшу достаёт миниатюры всей страницы."""
+    thumbnails.prefetch(posts)
+    return ''
+
+
+@register.simple_tag
+def thumbnail_url(post, geometry):
+    """
+    Адрес заранее построенной миниатюры картинки поста.
+
+    Берёт адрес, подготовленный prefetch_thumbnails, а без него
+    обращается к кэшу сам. Пока миниатюры нет, отдаёт адрес
+    исходной картинки.
+    """
+    if not post.image:
+        return ''
+    prefetched = getattr(post, 'thumbnail_urls', None)
+    if prefetched is not None:
+        url = prefetched.get(geometry)
+    else:
+        url = thumbnails.thumbnail_url(post.image, geometry)
+    return url or post.image.url
@@ -0,0 +1,193 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import caching
+from posts.models import Group, Post, User
+
+
+class FeedCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.group1 = Group.objects.create(
+            title='Тестовая группа1',
+            slug='test-slug1',
+            description='Тестовое описание1',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый текст', author=cls.user, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(FeedCacheTest.user)
+
+    def get_group_page(self, group):
+        return self.authorized_client.get(
+            reverse('posts:group_list', kwargs={'slug': group.slug})
+        )
+
+    def test_post_edit_invalidates_both_groups(self):
+        """Перенос поста в другую группу обновляет обе ленты групп."""
+        self.assertContains(self.get_group_page(self.group), 'Тестовый текст')
+        self.assertNotContains(
+            self.get_group_page(self.group1), 'Тестовый текст'
+        )
+        self.authorized_client.post(
+            reverse('posts:post_edit',
+                    kwargs={'post_id': FeedCacheTest.post.pk}),
+            data={'text': 'Новый текст', 'group': self.group1.pk},
+        )
+        self.assertNotContains(
+            self.get_group_page(self.group), 'Новый текст'
+        )
+        self.assertContains(self.get_group_page(self.group1), 'Новый текст')
+
+    def test_comment_invalidates_post_page(self):
+        """Новый комментарий сразу виден на странице поста."""
+        address = reverse('posts:post_detail',
+                          kwargs={'post_id': FeedCacheTest.post.pk})
+        self.authorized_client.get(address)
+        self.authorized_client.post(
+            reverse('posts:add_comment',
+                    kwargs={'post_id': FeedCacheTest.post.pk}),
+            data={'text': 'Свежий комментарий'},
+        )
+        self.assertContains(
+            self.authorized_client.get(address), 'Свежий комментарий'
+        )
+
+    def test_post_body_follows_namespace_version(self):
+        """Тело поста перерисовывается после сброса версии поста."""
+        address = reverse('posts:post_detail',
+                          kwargs={'post_id': FeedCacheTest.post.pk})
+        self.authorized_client.get(address)
+        # Тот же (pk, version) с другим текстом, как после пересоздания базы
+        Post.objects.filter(pk=FeedCacheTest.post.pk).update(
+            text='Текст из другой базы, длиннее заголовка страницы'
+        )
+        caching.invalidate(('post', FeedCacheTest.post.pk))
+        self.assertContains(
+            self.authorized_client.get(address),
+            'Текст из другой базы, длиннее заголовка страницы',
+        )
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.post = Post.objects.create(
+            text='Тестовый текст', author=cls.author
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ConditionalGetTest.user)
+
+    def test_unchanged_page_not_modified(self):
+        """Гость с актуальным ETag или датой получает пустой 304."""
+        # Адрес: запросов к базе до ответа 304
+        addresses = {
+            reverse('posts:index'): 0,
+            reverse('posts:profile', args=('TestAuthor',)): 1,
+            reverse(
+                'posts:post_detail', args=(ConditionalGetTest.post.pk,)
+            ): 1,
+        }
+        for address, queries in addresses.items():
+            with self.subTest(address=address):
+                response = self.guest_client.get(address)
+                self.assertIn('no-cache', response['Cache-Control'])
+                with self.assertNumQueries(queries):
+                    response = self.guest_client.get(
+                        address, HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+                response = self.guest_client.get(
+                    address,
+                    HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+                )
+                self.assertEqual(response.status_code, 304)
+
+    def test_changes_reset_validators(self):
+        """Новый комментарий и подписка меняют ETag страниц."""
+        post_address = reverse(
+            'posts:post_detail', args=(ConditionalGetTest.post.pk,)
+        )
+        profile_address = reverse('posts:profile', args=('TestAuthor',))
+        post_etag = self.guest_client.get(post_address)['ETag']
+        profile_etag = self.guest_client.get(profile_address)['ETag']
+        self.authorized_client.post(
+            reverse('posts:add_comment', args=(ConditionalGetTest.post.pk,)),
+            data={'text': 'Свежий комментарий'},
+        )
+        self.authorized_client.get(
+            reverse('posts:profile_follow', args=('TestAuthor',))
+        )
+        response = self.guest_client.get(
+            post_address, HTTP_IF_NONE_MATCH=post_etag
+        )
+        self.assertContains(response, 'Свежий комментарий')
+        response = self.guest_client.get(
+            profile_address, HTTP_IF_NONE_MATCH=profile_etag
+        )
+        self.assertContains(response, 'Подписчиков: 1')
+
+    def test_authorized_pages_without_validators(self):
+        """Страницы вошедших пользователей отдаются без ETag."""
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('ETag'))
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    }})
+    def test_state_without_cache(self):
+        """Без кэша get_state отдаёт свежие значения, а не None."""
+        versions, modified = caching.get_state(('index',), ('post', 1))
+        self.assertEqual(len(versions + modified), 4)
+        self.assertNotIn(None, versions + modified)
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    }})
+    def test_pages_work_without_cache(self):
+        """Без кэша версии не хранятся, и 304 не отдаётся."""
+        address = reverse('posts:index')
+        etag = self.guest_client.get(address)['ETag']
+        response = self.guest_client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class SharedCacheCheckTest(TestCase):
+    def test_process_local_cache_warns_on_deploy(self):
+        """check --deploy предупреждает о кэше одного процесса."""
+        for backend, warnings in (
+            ('locmem.LocMemCache', ['posts.W001']),
+            ('filebased.FileBasedCache', []),
+        ):
+            with self.subTest(backend=backend), override_settings(CACHES={
+                'default': {
+                    'BACKEND': f'django.core.cache.backends.{backend}',
+                },
+            }):
+                self.assertEqual(
+                    [
+                        warning.id
+                        for warning in caching.check_shared_cache(None)
+                    ],
+                    warnings,
+                )
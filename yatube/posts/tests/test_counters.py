@@ -0,0 +1,77 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import Comment, Follow, Post, User, UserStats
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+
+    def test_counters_follow_writes(self):
+        """Счётчики меняются при создании и удалении объектов."""
+        post = Post.objects.create(text='Тестовый текст', author=self.author)
+        comment = Comment.objects.create(
+            text='Комментарий', post=post, author=self.reader
+        )
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        post.refresh_from_db()
+        author_stats = UserStats.objects.get(user=self.author)
+        reader_stats = UserStats.objects.get(user=self.reader)
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(author_stats.posts_count, 1)
+        self.assertEqual(author_stats.followers_count, 1)
+        self.assertEqual(reader_stats.following_count, 1)
+        comment.delete()
+        follow.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        post.delete()
+        author_stats.refresh_from_db()
+        reader_stats.refresh_from_db()
+        self.assertEqual(author_stats.posts_count, 0)
+        self.assertEqual(author_stats.followers_count, 0)
+        self.assertEqual(reader_stats.following_count, 0)
+
+    def test_drifted_counters_stay_non_negative(self):
+        """Удаление не падает, если объект не попал в счётчик."""
+        post = Post.objects.create(text='Тестовый текст', author=self.author)
+        Comment.objects.bulk_create([
+            Comment(text='Комментарий', post=post, author=self.reader)
+        ])
+        Follow.objects.bulk_create([
+            Follow(user=self.reader, author=self.author)
+        ])
+        Comment.objects.get(post=post).delete()
+        Follow.objects.get(user=self.reader).delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).followers_count, 0
+        )
+
+    def test_reconcile_fixes_drift(self):
+        """Команда reconcile_counters исправляет расхождения."""
+        Post.objects.bulk_create([
+            Post(text=f'Тестовый текст{i}', author=self.author)
+            for i in range(3)
+        ])
+        UserStats.objects.filter(user=self.reader).delete()
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).posts_count, 3
+        )
+        self.assertTrue(UserStats.objects.filter(user=self.reader).exists())
+
+    def test_reconcile_creates_many_missing_stats(self):
+        """Строки счётчиков создаются и для сотен пользователей сразу."""
+        User.objects.bulk_create([
+            User(username=f'Bulk{number}') for number in range(600)
+        ])
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertFalse(User.objects.filter(stats__isnull=True).exists())
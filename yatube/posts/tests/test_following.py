@@ -0,0 +1,82 @@
+import threading
+
+from django.db import connections
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from posts import following
+from posts.models import Follow, User, UserStats
+
+THREADS: int = 8  # Одновременных запросов в тесте гонки
+
+
+class FollowTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.author = User.objects.create_user(username='TestAuthor')
+
+    def test_follow_and_unfollow_are_idempotent(self):
+        """Повторная подписка и отписка ничего не меняют."""
+        user, author = FollowTest.user, FollowTest.author
+        with self.assertNumQueries(1):
+            self.assertFalse(following.unfollow(user, author))
+        self.assertTrue(following.follow(user, author))
+        self.assertFalse(following.follow(user, author))
+        self.assertFalse(following.follow(user, user))
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(UserStats.objects.get(user=author).followers_count, 1)
+        self.assertTrue(following.unfollow(user, author))
+        self.assertFalse(following.unfollow(user, author))
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(UserStats.objects.get(user=author).followers_count, 0)
+
+
+class ConcurrentFollowTest(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='TestUser')
+        self.author = User.objects.create_user(username='TestAuthor')
+
+    def hammer(self, name):
+        """Запускает THREADS одинаковых запросов одновременно."""
+        address = reverse(name, args=(self.author.username,))
+        clients = []
+        for _ in range(THREADS):
+            client = Client()
+            client.force_login(self.user)
+            clients.append(client)
+        barrier = threading.Barrier(THREADS, timeout=10)
+        statuses = []
+
+        def request(client):
+            barrier.wait()
+            try:
+                statuses.append(client.get(address).status_code)
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=request, args=(client,))
+            for client in clients
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return statuses
+
+    def test_concurrent_follow_and_unfollow(self):
+        """Одновременные клики не падают и не сдвигают счётчики дважды."""
+        self.assertEqual(
+            self.hammer('posts:profile_follow'), [302] * THREADS
+        )
+        self.assertEqual(Follow.objects.count(), 1)
+        stats = UserStats.objects.get(user=self.author)
+        self.assertEqual(stats.followers_count, 1)
+        self.assertEqual(
+            self.hammer('posts:profile_unfollow'), [302] * THREADS
+        )
+        self.assertFalse(Follow.objects.exists())
+        stats.refresh_from_db()
+        self.assertEqual(stats.followers_count, 0)
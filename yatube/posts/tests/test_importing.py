@@ -0,0 +1,113 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts import importing
+from posts.models import Comment, Group, Post, User, UserStats
+
+
+class ImportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.checkpoint = os.path.join(self.directory, 'checkpoint.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def write(self, rows):
+        path = os.path.join(self.directory, 'import.ndjson')
+        with open(path, 'w', encoding='utf-8') as file:
+            for row in rows:
+                line = row if isinstance(row, str) else json.dumps(row)
+                file.write(line + '\n')
+        return path
+
+    def test_import_posts_and_report_errors(self):
+        """Посты вставляются пачками, плохие строки пропускаются."""
+        path = self.write([
+            {'text': 'Первый', 'author': 'TestUser', 'group': 'test-slug',
+             'pub_date': '2020-01-01T10:00:00+00:00'},
+            {'text': 'Второй', 'author': 'TestUser'},
+            'не JSON',
+            {'text': 'Чужой', 'author': 'Nobody'},
+            {'text': 'Без группы', 'author': 'TestUser', 'group': 'none'},
+            {'text': 'Третий', 'author': 'TestUser'},
+        ])
+        stderr = StringIO()
+        call_command(
+            'import_posts', path, batch_size=2,
+            stdout=StringIO(), stderr=stderr,
+        )
+        self.assertEqual(
+            sorted(Post.objects.values_list('text', flat=True)),
+            ['Второй', 'Первый', 'Третий'],
+        )
+        first = Post.objects.get(text='Первый')
+        self.assertEqual(first.group, ImportTest.group)
+        self.assertEqual(first.pub_date.year, 2020)
+        self.assertIn('строка 4: автор', stderr.getvalue())
+        self.assertEqual(len(stderr.getvalue().splitlines()), 3)
+        # Счётчики сверены после вставки в обход сигналов
+        self.assertEqual(
+            UserStats.objects.get(user=ImportTest.user).posts_count, 3
+        )
+
+    def test_resume_from_checkpoint(self):
+        """После сбоя импорт продолжается с последней записанной пачки."""
+        path = self.write(
+            {'text': f'Пост {number}', 'author': 'TestUser'}
+            for number in range(5)
+        )
+        with mock.patch.object(
+            importing.thumbnails, 'enqueue',
+            side_effect=[None, RuntimeError('сбой')],
+        ):
+            with self.assertRaises(RuntimeError):
+                importing.import_file(
+                    'posts', path, batch_size=2, checkpoint=self.checkpoint
+                )
+        self.assertEqual(Post.objects.count(), 2)
+        state = importing.import_file(
+            'posts', path, batch_size=2, checkpoint=self.checkpoint
+        )
+        self.assertEqual((state['line'], state['imported']), (5, 5))
+        self.assertEqual(
+            sorted(Post.objects.values_list('text', flat=True)),
+            [f'Пост {number}' for number in range(5)],
+        )
+
+    def test_import_comments_keeps_ids(self):
+        """Комментарии с id не дублируются; к чужому посту — ошибка."""
+        post = Post.objects.create(text='Пост', author=ImportTest.user)
+        path = self.write([
+            {'id': 100, 'post': post.pk, 'author': 'TestUser',
+             'text': 'Комментарий'},
+            {'post': post.pk + 1, 'author': 'TestUser', 'text': 'Потерянный'},
+        ])
+        errors = []
+        state = importing.import_file('comments', path, error=errors.append)
+        self.assertEqual((state['imported'], state['skipped']), (1, 0))
+        # Повтор не вставляет комментарий с тем же id и не считает его
+        state = importing.import_file('comments', path, error=errors.append)
+        self.assertEqual((state['imported'], state['skipped']), (0, 1))
+        self.assertEqual(state['errors'], 1)
+        self.assertEqual(errors[0], f'строка 2: пост {post.pk + 1} не найден')
+        comment = Comment.objects.get()
+        self.assertEqual((comment.pk, comment.post), (100, post))
+        self.assertEqual(Post.objects.get(pk=post.pk).comments_count, 1)
@@ -82,3 +82,20 @@ class PostModelTest(TestCase):
             with self.subTest(field=field):
                 self.assertEqual(
                     group._meta.get_field(field).help_text, expected_value)
+
+    def test_save_bumps_version_and_modified(self):
+        """Каждое сохранение поста увеличивает версию и время изменения."""
+        post = Post.objects.create(author=PostModelTest.user, text='Черновик')
+        self.assertEqual(post.version, 1)
+        self.assertGreaterEqual(post.modified, post.pub_date)
+        created = post.modified
+        post.text = 'Исправленный текст'
+        post.save()
+        self.assertEqual(post.version, 2)
+        stale = Post.objects.get(pk=post.pk)
+        post.save(update_fields=['text'])
+        # Копия, загруженная раньше, не откатывает номер версии
+        stale.save()
+        stale.refresh_from_db()
+        self.assertEqual(stale.version, 4)
+        self.assertGreater(stale.modified, created)
@@ -0,0 +1,107 @@
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+from posts.utils import feed_queryset
+
+
+class FeedQueriesTest(TestCase):
+    """Число запросов на страницу ленты не зависит от числа постов."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.authors = [
+            User.objects.create_user(
+                username=f'Author{i}', first_name='Имя', last_name='Фамилия'
+            )
+            for i in range(3)
+        ]
+        for author in cls.authors:
+            Follow.objects.create(user=cls.reader, author=author)
+        groups = [
+            Group.objects.create(
+                title=f'Группа {i}', slug=f'group-{i}', description='-'
+            )
+            for i in range(3)
+        ]
+        for i in range(12):
+            Post.objects.create(
+                text=f'Тестовый текст{i}',
+                author=cls.authors[i % 3],
+                group=cls.group if i % 2 else groups[i % 3],
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(FeedQueriesTest.reader)
+
+    def test_feed_pages_query_count(self):
+        """Ленты укладываются в фиксированное число запросов."""
+        # Подсчёт постов и сама страница; для групп и профиля ещё
+        # запрос группы или автора вместе с его счётчиками.
+        # Кэш фрагментов сбрасываем, чтобы страница строилась заново
+        pages = (
+            (reverse('posts:index'), 2),
+            (reverse('posts:group_list',
+                     kwargs={'slug': FeedQueriesTest.group.slug}), 3),
+            (reverse('posts:profile',
+                     kwargs={'username': FeedQueriesTest.authors[0]}), 3),
+        )
+        for address, queries in pages:
+            for page in ('', '?page=2'):
+                with self.subTest(address=address, page=page):
+                    cache.clear()
+                    with self.assertNumQueries(queries):
+                        self.guest_client.get(address + page)
+
+    def test_follow_index_query_count(self):
+        """Лента подписок укладывается в фиксированное число запросов."""
+        # Сессия, пользователь, авторы-«звёзды», подсчёт и страница
+        with self.assertNumQueries(5):
+            self.reader_client.get(reverse('posts:follow_index'))
+
+    def test_post_detail_query_count(self):
+        """Страница поста не зависит от числа комментариев и их авторов."""
+        post = Post.objects.filter(group=FeedQueriesTest.group).first()
+        address = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        for number, author in enumerate(FeedQueriesTest.authors, 1):
+            Comment.objects.create(
+                text='Комментарий', post=post, author=author
+            )
+            cache.clear()
+            # Пост с автором, его счётчиками и группой; комментарии
+            with self.subTest(comments=number):
+                with self.assertNumQueries(2):
+                    self.guest_client.get(address)
+            cache.clear()
+            # Для вошедшего ещё сессия и пользователь
+            with self.subTest(comments=number, user=True):
+                with self.assertNumQueries(4):
+                    self.reader_client.get(address)
+
+    @skipUnless(connection.vendor == 'sqlite', 'план запроса SQLite')
+    def test_feeds_are_sorted_by_index(self):
+        """Ленты и комментарии читаются по индексу без отдельной сортировки."""
+        author = FeedQueriesTest.authors[0]
+        querysets = (
+            feed_queryset(FeedQueriesTest.group.posts.all()),
+            feed_queryset(author.posts.all()),
+            Comment.objects.filter(post=Post.objects.first()).order_by(
+                '-pub_date', '-pk'
+            ),
+        )
+        for queryset in querysets:
+            with self.subTest(query=str(queryset.query)):
+                self.assertNotIn('TEMP B-TREE', queryset[:10].explain())
@@ -0,0 +1,93 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import search
+from posts.models import Comment, Post, User
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.cat_post = Post.objects.create(
+            text='Кошка спит на диване', author=cls.user
+        )
+        cls.dog_post = Post.objects.create(
+            text='Собака гуляет во дворе', author=cls.user
+        )
+        Comment.objects.create(
+            text='А кошка у соседей рыжая',
+            post=cls.dog_post,
+            author=cls.user,
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def found(self, query):
+        return list(search.search(query)[0:10])
+
+    def test_search_finds_posts_and_comments(self):
+        """Поиск находит пост и по тексту, и по комментарию."""
+        self.assertEqual(self.found('собака'), [SearchTest.dog_post])
+        self.assertCountEqual(
+            self.found('кошка'), [SearchTest.cat_post, SearchTest.dog_post]
+        )
+        self.assertEqual(search.search('кошка').count(), 2)
+        self.assertEqual(self.found('кошка диване'), [SearchTest.cat_post])
+        self.assertEqual(self.found('"*) OR ('), [])
+
+    def test_index_follows_changes(self):
+        """Индекс обновляется при правке и удалении поста и комментария."""
+        post = Post.objects.get(pk=SearchTest.cat_post.pk)
+        post.text = 'Попугай сидит в клетке'
+        post.save()
+        self.assertEqual(self.found('попугай'), [post])
+        self.assertEqual(self.found('диване'), [])
+        Comment.objects.filter(post=SearchTest.dog_post).delete()
+        self.assertEqual(self.found('рыжая'), [])
+        post.delete()
+        self.assertEqual(self.found('попугай'), [])
+
+    def test_search_page_and_api(self):
+        """Страница поиска и API отдают найденные посты."""
+        response = self.guest_client.get(
+            reverse('posts:search'), {'q': 'собака'}
+        )
+        self.assertTemplateUsed(response, 'posts/search.html')
+        self.assertEqual(
+            list(response.context['page_obj']), [SearchTest.dog_post]
+        )
+        response = self.guest_client.get(
+            reverse('posts:search_api'), {'q': 'кошка'}
+        )
+        data = response.json()
+        self.assertEqual(data['count'], 2)
+        self.assertCountEqual(
+            [result['id'] for result in data['results']],
+            [SearchTest.cat_post.pk, SearchTest.dog_post.pk],
+        )
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идёт через индекс, а не LIKE."""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        client = Client()
+        client.force_login(admin)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'собака'}
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list), [SearchTest.dog_post]
+        )
+
+    def test_incomplete_backend_fails_on_creation(self):
+        """Бэкенд без методов поиска нельзя создать."""
+        class IndexOnlyBackend(search.BaseSearchBackend):
+            def count(self, query):
+                return 0
+
+        with self.assertRaises(TypeError):
+            IndexOnlyBackend()
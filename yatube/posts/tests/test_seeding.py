@@ -0,0 +1,62 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from posts import counters, search
+from posts.models import (
+    Comment, Follow, Group, Post, TimelineEntry, User
+)
+
+
+class SeedCommandTest(TestCase):
+    def seed(self, **options):
+        defaults = {
+            'users': 20,
+            'groups': 2,
+            'posts': 200,
+            'comments': 100,
+            'follows': 3,
+            'images': 0,
+            'batch_size': 64,
+            'stdout': StringIO(),
+        }
+        defaults.update(options)
+        call_command('seed', **defaults)
+
+    def test_seed_creates_consistent_data(self):
+        """Сид создаёт данные и перестраивает производные таблицы."""
+        self.seed()
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 100)
+        self.assertTrue(Follow.objects.exists())
+        self.assertTrue(TimelineEntry.objects.exists())
+        self.assertEqual(
+            set(counters.reconcile(dry_run=True).values()), {0}
+        )
+        word = Post.objects.first().text.split()[0].strip('.,')
+        self.assertGreater(search.search(word).count(), 0)
+        # Авторы распределены по степенному закону
+        first, last = User.objects.order_by('pk')[::19]
+        self.assertGreater(first.posts.count(), last.posts.count())
+
+    def test_seed_is_deterministic(self):
+        """Одинаковый seed даёт одинаковые данные."""
+        self.seed(seed=7, prefix='a')
+        first = list(Post.objects.order_by('pk').values_list(
+            'author__username', 'text', 'pub_date__date'
+        ))
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        self.seed(seed=7, prefix='a')
+        second = list(Post.objects.order_by('pk').values_list(
+            'author__username', 'text', 'pub_date__date'
+        ))
+        self.assertEqual(first, second)
+
+    def test_seed_refuses_to_reuse_prefix(self):
+        """Повторный сид с тем же префиксом не смешивает данные."""
+        self.seed(posts=0, comments=0)
+        with self.assertRaises(CommandError):
+            self.seed(posts=0, comments=0)
@@ -0,0 +1,125 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import thumbnails
+from posts.models import Post, ThumbnailJob, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailPipelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ThumbnailPipelineTest.user)
+
+    def test_upload_queues_and_worker_builds_thumbnails(self):
+        """Загрузка картинки ставит задание, обработчик строит миниатюру."""
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={
+                'text': 'Пост с картинкой',
+                'image': SimpleUploadedFile(
+                    'small.gif', SMALL_GIF, content_type='image/gif'
+                ),
+            },
+        )
+        post = Post.objects.get(text='Пост с картинкой')
+        self.assertTrue(
+            ThumbnailJob.objects.filter(image=post.image.name).exists()
+        )
+        # Пока миниатюры нет, в кэш попадают страницы с исходной картинкой
+        pages = (
+            reverse('posts:index'),
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}),
+        )
+        for address in pages:
+            self.assertContains(
+                self.authorized_client.get(address), post.image.url
+            )
+        self.assertEqual(thumbnails.process_jobs(workers=1), 1)
+        self.assertFalse(ThumbnailJob.objects.exists())
+        url = thumbnails.thumbnail_url(post.image, '960x339')
+        self.assertIsNotNone(url)
+        self.assertNotEqual(url, post.image.url)
+        for address in pages:
+            with self.subTest(address=address):
+                response = self.authorized_client.get(address)
+                self.assertContains(response, url)
+                self.assertNotContains(response, post.image.url)
+
+    def test_feed_page_resolves_thumbnails_in_one_lookup(self):
+        """Лента достаёт миниатюры всей страницы одним get_many."""
+        posts = [
+            Post.objects.create(
+                text=f'Пост {i}',
+                author=ThumbnailPipelineTest.user,
+                image=f'posts/{i}.gif',
+            )
+            for i in range(3)
+        ]
+        ThumbnailJob.objects.all().delete()
+        ready = posts[0].image.name
+        cache.set(thumbnails.thumbnail_key(ready, '960x339'), '/thumb.jpg')
+        with mock.patch('posts.thumbnails.cache', wraps=cache) as spy:
+            response = self.authorized_client.get(reverse('posts:index'))
+        spy.get_many.assert_called_once()
+        spy.get.assert_not_called()
+        self.assertContains(response, '/thumb.jpg')
+        self.assertContains(response, posts[1].image.url)
+        self.assertEqual(
+            set(ThumbnailJob.objects.values_list('image', flat=True)),
+            {posts[1].image.name, posts[2].image.name},
+        )
+
+    def test_missing_thumbnail_is_queued_once(self):
+        """Показ картинки без миниатюры не ставит её в очередь каждый раз."""
+        post = Post.objects.create(
+            text='Пост', author=ThumbnailPipelineTest.user, image='posts/1.gif'
+        )
+        ThumbnailJob.objects.all().delete()
+        thumbnails.prefetch([post])
+        self.assertEqual(ThumbnailJob.objects.count(), 1)
+        ThumbnailJob.objects.all().delete()
+        with self.assertNumQueries(0):
+            thumbnails.prefetch([post])
+            thumbnails.thumbnail_url(post.image, '960x339')
+        # Когда отметка истекла, картинка снова попадает в очередь
+        cache.delete(thumbnails.queued_key(post.image.name))
+        thumbnails.thumbnail_url(post.image, '960x339')
+        self.assertEqual(ThumbnailJob.objects.count(), 1)
+
+    def test_worker_requires_shared_cache(self):
+        """Обработчик не запускается с кэшем одного процесса."""
+        for command in ('thumbnail_worker', 'backfill_thumbnails'):
+            with self.subTest(command=command):
+                with self.assertRaises(CommandError):
+                    call_command(command)
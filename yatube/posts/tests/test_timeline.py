@@ -0,0 +1,107 @@
+from unittest import mock
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import timeline
+from posts.models import Follow, Post, TimelineEntry, User
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(TimelineTest.reader)
+
+    def follow(self):
+        self.reader_client.get(
+            reverse('posts:profile_follow',
+                    kwargs={'username': TimelineTest.author})
+        )
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост автора попадает в ленту подписчика."""
+        self.follow()
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        self.assertEqual(list(response.context['page_obj']), [post])
+
+    def test_follow_backfills_and_unfollow_removes(self):
+        """Подписка дозаполняет ленту, отписка очищает её."""
+        Post.objects.create(text='Старый пост', author=self.author)
+        self.follow()
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 1
+        )
+        self.reader_client.get(
+            reverse('posts:profile_unfollow',
+                    kwargs={'username': TimelineTest.author})
+        )
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.reader).exists()
+        )
+
+    def test_orm_follows_maintain_timeline(self):
+        """Подписки через ORM меняют ленту так же, как из представлений."""
+        post = Post.objects.create(text='Старый пост', author=self.author)
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(list(timeline.timeline_posts(self.reader)), [post])
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        follow.delete()
+        self.assertFalse(timeline.timeline_posts(self.reader).exists())
+
+    @mock.patch.object(timeline, 'TIMELINE_SLACK', 0)
+    @mock.patch.object(timeline, 'TIMELINE_LENGTH', 2)
+    def test_timeline_is_trimmed(self):
+        """Лента не растёт больше заданной длины."""
+        self.follow()
+        for i in range(4):
+            Post.objects.create(text=f'Пост {i}', author=self.author)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 2
+        )
+
+    @mock.patch.object(timeline, 'FANOUT_FOLLOWERS_LIMIT', 0)
+    def test_celebrity_posts_read_on_request(self):
+        """Посты популярных авторов подмешиваются при чтении ленты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Пост звезды', author=self.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(list(timeline.timeline_posts(self.reader)), [post])
+
+    @mock.patch.object(timeline, 'FANOUT_FOLLOWERS_LIMIT', 1)
+    def test_author_below_limit_is_fanned_out(self):
+        """После отписки посты бывшего популярного автора остаются в ленте."""
+        other = User.objects.create_user(username='Other')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=other, author=self.author)
+        post = Post.objects.create(text='Пост звезды', author=self.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(list(timeline.timeline_posts(self.reader)), [post])
+        other_client = Client()
+        other_client.force_login(other)
+        other_client.get(
+            reverse('posts:profile_unfollow',
+                    kwargs={'username': TimelineTest.author})
+        )
+        self.assertEqual(list(timeline.timeline_posts(self.reader)), [post])
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        # Новые посты раскладываются сразу
+        new_post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertTrue(
+            TimelineEntry.objects.filter(
+                user=self.reader, post=new_post
+            ).exists()
+        )
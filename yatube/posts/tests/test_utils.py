@@ -0,0 +1,117 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from posts.utils import (COUNT_PAGES, OFFSET_PAGES_LIMIT, CursorPage,
+                         decode_cursor, encode_cursor)
+
+
+class CursorPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        # Постов хватает на OFFSET_PAGES_LIMIT страниц и ещё на две
+        Post.objects.bulk_create([
+            Post(text=f'Тестовый текст{i}', author=cls.user)
+            for i in range(COUNT_PAGES * (OFFSET_PAGES_LIMIT + 1) + 3)
+        ])
+        cls.ordered = list(Post.objects.order_by('-pub_date', '-pk'))
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_cursor_round_trip(self):
+        """Курсор кодируется и разбирается обратно."""
+        post = CursorPaginatorTest.ordered[0]
+        self.assertEqual(
+            decode_cursor(encode_cursor(post)),
+            (post.pub_date, post.pk, 'next')
+        )
+        self.assertIsNone(decode_cursor('битый-курсор'))
+
+    def test_last_offset_page_links_to_cursor(self):
+        """С последней страницы по номеру навигация уходит на курсоры."""
+        response = self.guest_client.get(
+            reverse('posts:index') + f'?page={OFFSET_PAGES_LIMIT}'
+        )
+        page_obj = response.context['page_obj']
+        self.assertIsNotNone(page_obj.next_cursor)
+        self.assertContains(response, f'?cursor={page_obj.next_cursor}')
+
+    def test_cursor_pages_follow_offset_pages(self):
+        """Курсорные страницы продолжают выдачу без пропусков и повторов."""
+        response = self.guest_client.get(
+            reverse('posts:index') + f'?page={OFFSET_PAGES_LIMIT}'
+        )
+        cursor = response.context['page_obj'].next_cursor
+        response = self.guest_client.get(
+            reverse('posts:index') + f'?cursor={cursor}'
+        )
+        page_obj = response.context['page_obj']
+        self.assertIsInstance(page_obj, CursorPage)
+        start = COUNT_PAGES * OFFSET_PAGES_LIMIT
+        self.assertEqual(
+            list(page_obj),
+            CursorPaginatorTest.ordered[start:start + COUNT_PAGES]
+        )
+        response = self.guest_client.get(
+            reverse('posts:index') + f'?cursor={page_obj.next_cursor}'
+        )
+        last_page = response.context['page_obj']
+        self.assertEqual(len(last_page), 3)
+        self.assertFalse(last_page.has_next())
+        # Возврат назад даёт ту же страницу, что и переход вперёд
+        response = self.guest_client.get(
+            reverse('posts:index') + f'?cursor={last_page.previous_cursor}'
+        )
+        self.assertEqual(list(response.context['page_obj']), list(page_obj))
+
+    def test_cursor_page_skips_count(self):
+        """Курсорная страница не выполняет COUNT(*)."""
+        cursor = encode_cursor(CursorPaginatorTest.ordered[COUNT_PAGES - 1])
+        with CaptureQueriesContext(connection) as context:
+            self.guest_client.get(reverse('posts:index') + f'?cursor={cursor}')
+        for query in context.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'])
+
+
+class TiedDatesPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create([
+            Post(text=f'Тестовый текст{i}', author=cls.user, group=cls.group)
+            for i in range(COUNT_PAGES * (OFFSET_PAGES_LIMIT + 2))
+        ])
+        # Одинаковая дата у всех постов, как у импорта с точностью до секунд
+        Post.objects.update(pub_date=Post.objects.first().pub_date)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_tied_dates_pages_without_gaps(self):
+        """При равных датах обход страниц выдаёт каждый пост один раз."""
+        address = reverse('posts:group_list', args=('test-slug',))
+        seen = []
+        for page in range(1, OFFSET_PAGES_LIMIT + 1):
+            response = self.guest_client.get(address, {'page': page})
+            seen += [post.pk for post in response.context['page_obj']]
+        cursor = response.context['page_obj'].next_cursor
+        while cursor:
+            response = self.guest_client.get(address, {'cursor': cursor})
+            seen += [post.pk for post in response.context['page_obj']]
+            cursor = response.context['page_obj'].next_cursor
+        ordered = Post.objects.order_by('-pk').values_list('pk', flat=True)
+        self.assertEqual(seen, list(ordered))
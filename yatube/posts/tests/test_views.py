@@ -1,13 +1,16 @@
 import shutil
 import tempfile
+from io import StringIO
 
 from django import forms
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
 from posts.models import Comment, Follow, Group, Post, User
+from posts.utils import COMMENTS_PAGE_SIZE
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
@@ -56,6 +59,8 @@ class PostViewsTests(TestCase):
                 )
             )
         Post.objects.bulk_create(posts_list)
+        # bulk_create не вызывает сигналы, счётчики сверяем вручную
+        call_command('reconcile_counters', stdout=StringIO())
         cls.follow = Follow.objects.create(
             user=cls.user_2,
             author=cls.user_3
@@ -275,19 +280,52 @@ class PostViewsTests(TestCase):
                 text=form_data['text'],
             ).exists())
 
+    def test_post_comments_are_paginated(self):
+        """Первая порция комментариев на странице, остальные — фрагментом."""
+        post = PostViewsTests.post[0]
+        Comment.objects.bulk_create(
+            Comment(text=f'Комментарий {i}', post=post, author=self.user)
+            for i in range(COMMENTS_PAGE_SIZE + 5)
+        )
+        response = self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.id})
+        )
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENTS_PAGE_SIZE)
+        address = reverse('posts:post_comments', kwargs={'post_id': post.id})
+        # Проверка поста и порция комментариев вместе с авторами
+        with self.assertNumQueries(2):
+            response = self.guest_client.get(
+                address, {'cursor': comments.next_cursor}
+            )
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        self.assertEqual(len(response.context['comments']), 5)
+        self.assertFalse(response.context['comments'].has_next())
+        response = self.guest_client.get(
+            reverse('posts:post_comments', kwargs={'post_id': 0})
+        )
+        self.assertEqual(response.status_code, 404)
+
     def test_index_page_cache_work_correct(self):
-        """Кэширование постов на главной странице."""
+        """Кэширование постов на главной странице до следующей записи."""
         post = Post.objects.create(
             text='Test cache', author=PostViewsTests.user
         )
         response = self.authorized_client.get(
             reverse('posts:index')
         )
-        post.delete()
+        # Изменение в обход сигналов кэш не сбрасывает
+        Post.objects.filter(pk=post.pk).update(text='Changed')
         response2 = self.authorized_client.get(
             reverse('posts:index')
         )
         self.assertEqual(response.content, response2.content)
+        # Удаление поста сбрасывает версию ленты
+        post.delete()
+        response3 = self.authorized_client.get(
+            reverse('posts:index')
+        )
+        self.assertNotEqual(response.content, response3.content)
 
     def test_user_can_follow(self):
         """Авторизованный пользователь может подписываться"""
@@ -0,0 +1,188 @@
+"""
+Предварительная генерация миниатюр картинок постов.
+
+Сохранение картинки ставит задание в очередь ThumbnailJob, а команда
+thumbnail_worker строит миниатюры всех геометрий и кладёт их адреса
+в кэш. Шаблоны только читают готовые адреса и никогда не масштабируют
+картинку внутри запроса, поэтому кэш должен быть общим для сайта и
+обработчика. Пока миниатюры нет, страницы показывают исходную картинку,
+поэтому после постройки фрагменты кэша с этими постами сбрасываются.
+Отметка в кэше не даёт каждому показу такой страницы заново ставить
+картинку в очередь.
+"""
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.core.management.base import CommandError
+from django.db import connections
+from sorl.thumbnail import get_thumbnail
+
+from . import caching
+from .models import Post, ThumbnailJob
+
+logger = logging.getLogger(__name__)
+
+# Геометрии миниатюр, которые выводят шаблоны, и их параметры sorl
+THUMBNAIL_GEOMETRIES = {
+    '960x339': {'crop': 'center', 'upscale': True},
+}
+# Сколько секунд картинка без миниатюры не ставится в очередь повторно
+THUMBNAIL_REQUEUE_TIMEOUT: int = 60 * 10
+
+
+def _digest(name):
+    return hashlib.md5(name.encode()).hexdigest()
+
+
+def thumbnail_key(name, geometry):
+    return f'posts:thumbnail:{geometry}:{_digest(name)}'
+
+
+def queued_key(name):
+    return f'posts:thumbnail:queued:{_digest(name)}'
+
+
+def require_shared_cache():
+    """
+    Останавливает команду, которая строит миниатюры вне процесса сайта.
+
+    Адреса миниатюр и сброс страниц пишутся в кэш, и в кэше одного
+    процесса сайт их не увидит.
+    """
+    if caching.is_process_local():
+        raise CommandError(
+            'Кэш по умолчанию виден только этому процессу, и сайт не '
+            'увидит миниатюры. Задайте общий CACHE_BACKEND.'
+        )
+
+
+def generate(name):
+    """Строит все миниатюры картинки и кэширует их адреса."""
+    urls = {}
+    for geometry, options in THUMBNAIL_GEOMETRIES.items():
+        thumbnail = get_thumbnail(name, geometry, **options)
+        # Для битой или пропавшей картинки sorl отдаёт несуществующий файл
+        if thumbnail.exists():
+            urls[thumbnail_key(name, geometry)] = thumbnail.url
+    cache.set_many(urls, None)
+    return urls
+
+
+def generate_safely(name):
+    """generate, который пишет ошибки в лог и возвращает успех."""
+    try:
+        return bool(generate(name))
+    except Exception:
+        logger.exception('Не удалось построить миниатюры для %s', name)
+        return False
+
+
+def generate_in_thread(name):
+    """generate_safely для пула потоков: закрывает свои подключения."""
+    try:
+        return generate_safely(name)
+    finally:
+        connections.close_all()
+
+
+def refresh_pages(names):
+    """Сбрасывает кэш страниц с постами, у которых картинки из names."""
+    posts = Post.objects.filter(image__in=names).values_list(
+        'pk', 'author_id', 'group_id'
+    )
+    namespaces = set()
+    for pk, author_id, group_id in posts:
+        namespaces.update((('post', pk), ('author', author_id)))
+        if group_id is not None:
+            namespaces.add(('group', group_id))
+    if namespaces:
+        caching.invalidate(('index',), *sorted(namespaces))
+
+
+def enqueue(*names):
+    """Ставит картинки в очередь; повторная постановка ничего не делает."""
+    ThumbnailJob.objects.bulk_create(
+        [ThumbnailJob(image=name) for name in names], ignore_conflicts=True
+    )
+
+
+def schedule(post):
+    """Ставит в очередь миниатюры картинки поста."""
+    if post.image:
+        enqueue(post.image.name)
+
+
+def process_jobs(limit=100, workers=4):
+    """Выполняет до limit заданий из очереди; возвращает их число."""
+    jobs = list(ThumbnailJob.objects.values_list('pk', 'image')[:limit])
+    if not jobs:
+        return 0
+    names = [image for _, image in jobs]
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            generated = list(pool.map(generate_in_thread, names))
+    else:
+        generated = [generate_safely(name) for name in names]
+    refresh_pages([name for name, ok in zip(names, generated) if ok])
+    # Неудачные задания тоже снимаем: битая картинка не починится сама
+    ThumbnailJob.objects.filter(pk__in=[pk for pk, _ in jobs]).delete()
+    return len(jobs)
+
+
+def _requeue(names):
+    """Ставит в очередь картинки и отмечает это в кэше."""
+    if names:
+        cache.set_many(
+            {queued_key(name): True for name in names},
+            THUMBNAIL_REQUEUE_TIMEOUT,
+        )
+        enqueue(*sorted(names))
+
+
+def prefetch(posts):
+    """
+    Достаёт адреса миниатюр всех постов страницы одним get_many.
+
+    Найденные адреса кладутся в post.thumbnail_urls по геометриям,
+    картинки без готовых миниатюр и без отметки о постановке в очередь
+    ставятся в неё одним запросом.
+    """
+    posts = [post for post in posts if post.image]
+    keys = {
+        (post.image.name, geometry): thumbnail_key(post.image.name, geometry)
+        for post in posts
+        for geometry in THUMBNAIL_GEOMETRIES
+    }
+    queued = {post.image.name: queued_key(post.image.name) for post in posts}
+    found = {}
+    if posts:
+        found = cache.get_many([*keys.values(), *queued.values()])
+    missing = set()
+    for post in posts:
+        post.thumbnail_urls = {}
+        for geometry in THUMBNAIL_GEOMETRIES:
+            url = found.get(keys[post.image.name, geometry])
+            if url is None:
+                missing.add(post.image.name)
+            else:
+                post.thumbnail_urls[geometry] = url
+    _requeue({name for name in missing if queued[name] not in found})
+
+
+def thumbnail_url(image, geometry):
+    """
+    Готовый адрес миниатюры или None.
+
+    Если адрес вытеснен из кэша, картинка снова ставится в очередь,
+    но не чаще раза в THUMBNAIL_REQUEUE_TIMEOUT.
+    """
+    if not image:
+        return None
+    url = cache.get(thumbnail_key(image.name, geometry))
+    if url is None and cache.add(
+        queued_key(image.name), True, THUMBNAIL_REQUEUE_TIMEOUT
+    ):
+        enqueue(image.name)
+    return url
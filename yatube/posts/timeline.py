@@ -0,0 +1,194 @@
+"""
+Материализованная лента подписок.
+
+Новый пост раскладывается по лентам подписчиков в момент публикации
+(fan-out-on-write). Посты авторов с огромным числом подписчиков в ленты
+не копируются и подмешиваются при чтении (fan-out-on-read). Популярность
+определяется по счётчику подписчиков; когда автор опускается ниже
+порога, его последние посты раскладываются по лентам подписчиков.
+"""
+from django.db import connection
+from django.db.models import Count, Q
+
+from .models import Follow, Post, TimelineEntry, UserStats
+
+TIMELINE_LENGTH: int = 500  # Сколько записей хранится в ленте читателя
+# Допустимый перерасход ленты: обрезаем пачками, а не на каждый пост
+TIMELINE_SLACK: int = 50
+# Авторы с большим числом подписчиков читаются при запросе ленты
+FANOUT_FOLLOWERS_LIMIT: int = 1000
+FANOUT_BATCH_SIZE: int = 1000
+
+
+def is_celebrity(author_id):
+    """
+    Читаются ли посты автора при запросе ленты.
+
+    Порог проверяется по счётчику подписчиков и при раскладке, и при
+    чтении, чтобы обе стороны одинаково решали, где искать посты.
+    """
+    return UserStats.objects.filter(
+        user_id=author_id, followers_count__gt=FANOUT_FOLLOWERS_LIMIT
+    ).exists()
+
+
+def _followers(author_id):
+    """Подписчики автора или None, если автор слишком популярен."""
+    if is_celebrity(author_id):
+        return None
+    return list(
+        Follow.objects.filter(author_id=author_id).values_list(
+            'user_id', flat=True
+        )
+    )
+
+
+def _add_entries(user_ids, posts):
+    """Добавляет посты (пары id, дата) в ленты читателей user_ids."""
+    for start in range(0, len(user_ids), FANOUT_BATCH_SIZE):
+        batch = user_ids[start:start + FANOUT_BATCH_SIZE]
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(user_id=user_id, post_id=post_id,
+                              pub_date=pub_date)
+                for user_id in batch
+                for post_id, pub_date in posts
+            ],
+            batch_size=FANOUT_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        trim_overflowing(batch)
+
+
+def fan_out_post(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    followers = _followers(post.author_id)
+    if followers:
+        _add_entries(followers, [(post.pk, post.pub_date)])
+
+
+def trim_overflowing(user_ids):
+    """Обрезает ленты, которые вышли за TIMELINE_LENGTH + TIMELINE_SLACK."""
+    overflowing = (
+        TimelineEntry.objects.filter(user_id__in=user_ids)
+        .values('user_id')
+        .annotate(total=Count('id'))
+        .filter(total__gt=TIMELINE_LENGTH + TIMELINE_SLACK)
+        .values_list('user_id', flat=True)
+    )
+    for user_id in overflowing:
+        trim_timeline(user_id)
+
+
+def trim_timeline(user_id):
+    """Оставляет в ленте только TIMELINE_LENGTH самых свежих записей."""
+    cutoff = list(
+        TimelineEntry.objects.filter(user_id=user_id)
+        .order_by('-pub_date')
+        .values_list('pub_date', flat=True)
+        [TIMELINE_LENGTH:TIMELINE_LENGTH + 1]
+    )
+    if cutoff:
+        TimelineEntry.objects.filter(
+            user_id=user_id, pub_date__lte=cutoff[0]
+        ).delete()
+
+
+def _recent_posts(author_id):
+    return list(
+        Post.objects.filter(author_id=author_id)
+        .order_by('-pub_date')
+        .values_list('pk', 'pub_date')[:TIMELINE_LENGTH]
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту читателя последние посты нового автора."""
+    if is_celebrity(author_id):
+        return
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post_id=post_id,
+                          pub_date=pub_date)
+            for post_id, pub_date in _recent_posts(author_id)
+        ],
+        ignore_conflicts=True,
+    )
+    trim_timeline(user_id)
+
+
+def follower_lost(author_id):
+    """
+    Переводит автора на раскладку, когда подписчиков стало не больше порога.
+
+    Пока автор был популярен, его посты в ленты не копировались, поэтому
+    их нужно разложить всем оставшимся подписчикам. Вызывается после
+    уменьшения счётчика подписчиков.
+    """
+    crossed = UserStats.objects.filter(
+        user_id=author_id, followers_count=FANOUT_FOLLOWERS_LIMIT
+    ).exists()
+    if crossed:
+        followers = _followers(author_id)
+        if followers:
+            _add_entries(followers, _recent_posts(author_id))
+
+
+def rebuild():
+    """
+    Заново строит все ленты одним INSERT ... SELECT.
+
+    Нужно после массовой загрузки в обход сигналов; счётчики подписчиков
+    к этому моменту должны быть сверены.
+    """
+    TimelineEntry.objects.all().delete()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'''
+            INSERT INTO {TimelineEntry._meta.db_table}
+                (user_id, post_id, pub_date)
+            SELECT user_id, post_id, pub_date FROM (
+                SELECT follow.user_id, post.id AS post_id, post.pub_date,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY follow.user_id
+                           ORDER BY post.pub_date DESC
+                       ) AS position
+                FROM {Follow._meta.db_table} follow
+                JOIN {Post._meta.db_table} post
+                    ON post.author_id = follow.author_id
+                JOIN {UserStats._meta.db_table} stats
+                    ON stats.user_id = follow.author_id
+                WHERE stats.followers_count <= %s
+            ) ranked
+            WHERE position <= %s
+            ''',
+            [FANOUT_FOLLOWERS_LIMIT, TIMELINE_LENGTH],
+        )
+
+
+def remove_author(user_id, author_id):
+    """Убирает из ленты читателя посты автора, от которого он отписался."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def followed_celebrities(user):
+    """Авторы из подписок читателя, чьи посты читаются при запросе."""
+    return list(
+        UserStats.objects.filter(
+            user__in=Follow.objects.filter(user=user).values('author'),
+            followers_count__gt=FANOUT_FOLLOWERS_LIMIT,
+        ).values_list('user_id', flat=True)
+    )
+
+
+def timeline_posts(user):
+    """Посты ленты подписок читателя."""
+    condition = Q(
+        pk__in=TimelineEntry.objects.filter(user=user).values('post_id')
+    )
+    celebrities = followed_celebrities(user)
+    if celebrities:
+        condition |= Q(author__in=celebrities)
+    return Post.objects.filter(condition)
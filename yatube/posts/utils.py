@@ -1,10 +1,173 @@
-from django.core.paginator import Paginator
+import base64
+import json
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .models import Comment, Post
 
 COUNT_PAGES: int = 10  # Константа выборки постов для вывода на страницу
+# Сколько первых страниц доступно по ?page=N (COUNT + OFFSET),
+# дальше навигация идёт по курсорам
+OFFSET_PAGES_LIMIT: int = 5
+# Поля, которые шаблоны лент выводят для каждого поста
+FEED_FIELDS = (
+    'text',
+    'pub_date',
+    'image',
+    'author__username',
+    'author__first_name',
+    'author__last_name',
+    'group__slug',
+)
+# Комментариев на странице поста и в каждой подгружаемой порции
+COMMENTS_PAGE_SIZE: int = 20
+
+
+def feed_queryset(post_list=None):
+    """Посты для лент: автор и группа одним запросом, только нужные поля."""
+    if post_list is None:
+        post_list = Post.objects.all()
+    # Тот же ключ (pub_date, id), что у курсоров: при равных датах
+    # страницы по номеру и курсорные страницы не расходятся
+    return post_list.select_related('author', 'group').only(
+        *FEED_FIELDS
+    ).order_by('-pub_date', '-pk')
+
+
+def comments_page(post_id, cursor=None):
+    """Порция комментариев поста от новых к старым, с авторами."""
+    comments = Comment.objects.filter(post_id=post_id).select_related(
+        'author'
+    ).only('text', 'pub_date', 'author__username')
+    return CursorPaginator(comments, COMMENTS_PAGE_SIZE).get_page(cursor)
+
+
+def encode_cursor(obj, direction='next'):
+    """Непрозрачный курсор по ключу (pub_date, id) объекта."""
+    payload = json.dumps([obj.pub_date.isoformat(), obj.pk, direction])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Разбирает курсор. Для битого курсора возвращает None."""
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(cursor + padding)
+        pub_date, pk, direction = json.loads(raw.decode())
+        pub_date = parse_datetime(pub_date)
+    except (TypeError, ValueError):
+        return None
+    if pub_date is None or not isinstance(pk, int):
+        return None
+    if direction not in ('next', 'prev'):
+        return None
+    return pub_date, pk, direction
+
+
+class CursorPage(Page):
+    """Страница курсорной навигации: без номера и без общего COUNT(*)."""
+    def __init__(self, object_list, paginator, cursor=None,
+                 next_cursor=None, previous_cursor=None):
+        super().__init__(object_list, None, paginator)
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return '<Page cursor %s>' % (self.cursor or 'first')
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class CursorPaginator(Paginator):
+    """
+    Keyset-пагинация по (pub_date, id).
+
+    Вместо OFFSET отбирает записи «после» или «до» курсора по индексу
+    pub_date и не считает общее количество записей.
+    """
+    def page(self, cursor=None):
+        decoded = decode_cursor(cursor) if cursor else None
+        if decoded is None:
+            return self._build_page(self._after(None), cursor=None)
+        pub_date, pk, direction = decoded
+        if direction == 'prev':
+            return self._build_page(
+                self._before(pub_date, pk), cursor=cursor, backwards=True
+            )
+        return self._build_page(self._after((pub_date, pk)), cursor=cursor)
+
+    def get_page(self, cursor=None):
+        return self.page(cursor)
+
+    def _after(self, key):
+        queryset = self.object_list.order_by('-pub_date', '-pk')
+        if key is not None:
+            pub_date, pk = key
+            queryset = queryset.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+            )
+        return queryset
+
+    def _before(self, pub_date, pk):
+        return self.object_list.order_by('pub_date', 'pk').filter(
+            Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk)
+        )
+
+    def _build_page(self, queryset, cursor, backwards=False):
+        # Берём на одну запись больше, чтобы узнать, есть ли продолжение
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, cursor is not None
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = encode_cursor(rows[-1], 'next')
+        if rows and has_previous:
+            previous_cursor = encode_cursor(rows[0], 'prev')
+        return CursorPage(
+            rows, self, cursor=cursor,
+            next_cursor=next_cursor, previous_cursor=previous_cursor,
+        )
+
+
+class OffsetPaginator(Paginator):
+    """
+    Обычная постраничная навигация для первых OFFSET_PAGES_LIMIT страниц.
+
+    С последней «мелкой» страницы ссылка «Следующая» ведёт уже на курсор.
+    """
+    @property
+    def page_range(self):
+        return range(1, min(self.num_pages, OFFSET_PAGES_LIMIT) + 1)
+
+    @property
+    def has_deep_pages(self):
+        return self.num_pages > OFFSET_PAGES_LIMIT
+
+    def _get_page(self, *args, **kwargs):
+        page_obj = super()._get_page(*args, **kwargs)
+        page_obj.next_cursor = None
+        if page_obj.has_next() and page_obj.number >= OFFSET_PAGES_LIMIT:
+            page_obj.next_cursor = encode_cursor(page_obj[len(page_obj) - 1])
+        return page_obj
 
 
 def paginator(request, post_list):
-    paginator = Paginator(post_list, COUNT_PAGES)
+    cursor = request.GET.get('cursor')
+    if cursor:
+        return CursorPaginator(post_list, COUNT_PAGES).get_page(cursor)
+    paginator = OffsetPaginator(post_list, COUNT_PAGES)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
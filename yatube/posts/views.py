@@ -1,35 +1,57 @@
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import urlencode
 
+from core.routers import replica_reads
+
+from . import caching, counters, following, search, thumbnails, timeline
 from .forms import CommentForm, PostForm
 from .models import Follow, Group, Post, User
-from .utils import paginator
+from .utils import COUNT_PAGES, comments_page, feed_queryset, paginator
 
 
+@replica_reads
+@caching.conditional
 def index(request):
-    post_list = Post.objects.all()
+    caching.validate(request, ('index',))
+    post_list = feed_queryset()
     page_obj = paginator(request, post_list)
     context = {
         'page_obj': page_obj,
+        'feed_cache': caching.fragment_context(('index',)),
     }
     return render(request, 'posts/index.html', context)
 
 
+@replica_reads
+@caching.conditional
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
+    caching.validate(request, ('group', group.pk))
+    post_list = feed_queryset(group.posts.all())
     page_obj = paginator(request, post_list)
     context = {
         'group': group,
         'page_obj': page_obj,
+        'feed_cache': caching.fragment_context(('group', group.pk)),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@replica_reads
+@caching.conditional
 def profile(request, username):
-    username = get_object_or_404(User, username=username)
-    profile_posts = username.posts.all()
-    count_posts = profile_posts.count()
+    username = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
+    caching.validate(request, ('author', username.pk))
+    profile_posts = feed_queryset(username.posts.all())
+    stats = counters.stats_for(username)
     page_obj = paginator(request, profile_posts)
     following = (
         request.user.is_authenticated and Follow.objects.filter(
@@ -39,28 +61,92 @@ def profile(request, username):
     context = {
         'username': username,
         'profile_posts': profile_posts,
-        'count_posts': count_posts,
+        'count_posts': stats.posts_count,
+        'stats': stats,
         'page_obj': page_obj,
         'following': following,
+        'feed_cache': caching.fragment_context(('author', username.pk)),
     }
     return render(request, 'posts/profile.html', context)
 
 
+@replica_reads
+@caching.conditional
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.all()
+    # Автор с его счётчиками и группа приходят тем же запросом
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), pk=post_id
+    )
+    # На странице поста есть и счётчик постов автора
+    caching.validate(request, ('post', post.pk), ('author', post.author_id))
+    # Первая порция комментариев читается, только если её фрагмента
+    # нет в кэше; остальные подгружает post_comments
+    comments = SimpleLazyObject(lambda: comments_page(post.pk))
     form = CommentForm(request.POST or None)
-    count_posts = post.author.posts.count()
     context = {
         'post': post,
-        'count_posts': count_posts,
+        'count_posts': counters.stats_for(post.author).posts_count,
         'form': form,
         'comments': comments,
+        'post_cache': caching.fragment_context(('post', post.pk)),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@replica_reads
+@caching.conditional
+def post_comments(request, post_id):
+    """Следующая порция комментариев: фрагмент HTML по ?cursor=."""
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404
+    caching.validate(request, ('post', post_id))
+    context = {
+        'post_id': post_id,
+        'comments': comments_page(post_id, request.GET.get('cursor')),
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
+def search_page(request):
+    """Страница результатов поиска по ?q=, лучшие совпадения первыми."""
+    query = request.GET.get('q', '').strip()
+    results = Paginator(search.search(query), COUNT_PAGES)
+    return results.get_page(request.GET.get('page'))
+
+
+def post_search(request):
+    query = request.GET.get('q', '').strip()
+    context = {
+        'query': query,
+        'page_obj': search_page(request),
+        'page_query': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
+def post_search_api(request):
+    page_obj = search_page(request)
+    return JsonResponse({
+        'query': request.GET.get('q', '').strip(),
+        'count': page_obj.paginator.count,
+        'page': page_obj.number,
+        'num_pages': page_obj.paginator.num_pages,
+        'results': [
+            {
+                'id': post.pk,
+                'text': post.text,
+                'author': post.author.username,
+                'group': post.group.slug if post.group else None,
+                'pub_date': post.pub_date.isoformat(),
+                'url': reverse('posts:post_detail', args=(post.pk,)),
+            }
+            for post in page_obj
+        ],
+    }, json_dumps_params={'ensure_ascii': False})
+
+
 @login_required
+@transaction.atomic
 def post_create(request):
     form = PostForm(
         request.POST or None,
@@ -70,6 +156,7 @@ def post_create(request):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        thumbnails.schedule(post)
         return redirect('posts:profile', request.user)
     context = {
         'form': form
@@ -90,6 +177,8 @@ def post_edit(request, post_id):
     if form.is_valid():
         post = form.save(commit=False)
         post.save()
+        if 'image' in form.changed_data:
+            thumbnails.schedule(post)
         return redirect('posts:post_detail', post_id=post.pk)
     context = {
         'is_edit': True,
@@ -100,6 +189,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@transaction.atomic
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
@@ -111,12 +201,10 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@replica_reads
 @login_required
 def follow_index(request):
-    post = (
-        Post.objects.select_related('author', 'group').
-        filter(author__following__user=request.user)
-    )
+    post = feed_queryset(timeline.timeline_posts(request.user))
     page_obj = paginator(request, post)
     context = {
         'page_obj': page_obj,
@@ -128,11 +216,7 @@ def follow_index(request):
 def profile_follow(request, username):
     # Подписка на автора
     author = get_object_or_404(User, username=username)
-    follow_list = Follow.objects.filter(user=request.user, author=author)
-    if follow_list.exists():
-        return redirect('posts:profile', username=username)
-    if request.user != author:
-        Follow.objects.create(user=request.user, author=author)
+    following.follow(request.user, author)
     return redirect('posts:profile', username=username)
 
 
@@ -140,5 +224,5 @@ def profile_follow(request, username):
 def profile_unfollow(request, username):
     # Отписка от автора
     author = get_object_or_404(User, username=username)
-    Follow.objects.filter(user=request.user, author=author).delete()
+    following.unfollow(request.user, author)
     return redirect('posts:profile', username=author)
@@ -46,10 +46,15 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',  # Регистрация приложения Users
     'core.apps.CoreConfig',  # Регистрация приложения Core
     'about.apps.AboutConfig',  # Регистрация приложения About
+    'api.apps.ApiConfig',  # Регистрация приложения Api
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    # Первым, чтобы задержка включала все остальные middleware
+    'core.metrics.MetricsMiddleware',
+    # До сессий: запись сессии при входе тоже закрепляет за default
+    'core.routers.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -57,6 +62,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # После аутентификации: заголовок профилирования доступен сотрудникам
+    'core.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -87,12 +94,69 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
+# Подключение задаётся переменными окружения: DB_ENGINE=sqlite|postgresql,
+# DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT. Соединения живут
+# DB_CONN_MAX_AGE секунд и переиспользуются между запросами; при
+# DB_HEALTH_CHECKS=1 перед повторным использованием проверяется, что
+# соединение живо (core.db). DB_POOLER=pgbouncer — подключение через
+# PgBouncer в режиме transaction pooling, которому мешают серверные курсоры.
+
+DB_ENGINES = {
+    'sqlite': 'django.db.backends.sqlite3',
+    'postgresql': 'django.db.backends.postgresql',
+}
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite')
+DB_POOLER = os.getenv('DB_POOLER', '')
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'ENGINE': DB_ENGINES[DB_ENGINE],
+        'NAME': os.getenv(
+            'DB_NAME',
+            os.path.join(BASE_DIR, 'db.sqlite3')
+            if DB_ENGINE == 'sqlite' else 'yatube',
+        ),
+        'USER': os.getenv('DB_USER', ''),
+        'PASSWORD': os.getenv('DB_PASSWORD', ''),
+        'HOST': os.getenv('DB_HOST', ''),
+        'PORT': os.getenv('DB_PORT', ''),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+        'DISABLE_SERVER_SIDE_CURSORS': DB_POOLER == 'pgbouncer',
+        'OPTIONS': {} if DB_ENGINE == 'sqlite' else {'connect_timeout': 5},
+        # Тестовая SQLite в файле, а не в памяти: в общей памяти SQLite
+        # блокирует таблицы целиком и не ждёт busy_timeout, поэтому
+        # тесты с одновременными запросами из потоков падали бы
+        'TEST': {
+            'NAME': os.path.join(BASE_DIR, 'test_db.sqlite3')
+            if DB_ENGINE == 'sqlite' else None,
+        },
+    }
+}
+# Реплики только для чтения: DB_REPLICAS — хосты PostgreSQL или файлы
+# SQLite через запятую. Представления с @replica_reads читают с них,
+# а после записи пользователь REPLICA_STICKY_SECONDS читает из default.
+DATABASE_REPLICAS = []
+for number, replica in enumerate(
+    filter(None, os.getenv('DB_REPLICAS', '').split(',')), start=1
+):
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME' if DB_ENGINE == 'sqlite' else 'HOST': replica.strip(),
+        'TEST': {'MIRROR': 'default'},
     }
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.getenv('DB_REPLICA_STICKY_SECONDS', '10'))
+DB_HEALTH_CHECKS = os.getenv('DB_HEALTH_CHECKS', '1') == '1'
+# PRAGMA для каждого нового соединения SQLite: WAL не блокирует чтение
+# записью, NORMAL в режиме WAL не теряет целостность при сбое процесса
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    # Сколько миллисекунд ждать снятия блокировки записи
+    'busy_timeout': 5000,
 }
 
 
@@ -148,8 +212,61 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
+# Профилирование запросов (core.profiling): PROFILING_ENABLED=1 включает
+# замеры для доли PROFILING_SAMPLE_RATE запросов, а PROFILING_HEADER —
+# ключ request.META заголовка (например, HTTP_X_PROFILE для X-Profile),
+# который включает их для отдельного запроса при DEBUG или для сотрудника.
+# Если не задано ни то ни другое, middleware не подключается.
+# Результат — заголовок Server-Timing и JSON-строка в логе core.profiling.
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', '0') == '1'
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '1.0'))
+PROFILING_HEADER = os.getenv('PROFILING_HEADER') or None
+
+# Метрики /metrics (core.metrics). При нескольких воркерах каждый
+# сохраняет свой снимок в METRICS_DIR, и /metrics складывает их.
+# Каталог нужно очищать при перезапуске сервиса.
+METRICS_DIR = os.getenv('METRICS_DIR') or None
+
+# Cache
+# Кэш задаётся переменными окружения:
+# CACHE_BACKEND=memcached|redis|file|db|locmem и CACHE_LOCATION.
+# В нём лежат версии фрагментов и адреса миниатюр, поэтому он должен быть
+# общим для всех воркеров и thumbnail_worker. По умолчанию — файловый кэш
+# в каталоге проекта: общий для процессов одной машины, без отдельного
+# сервера. locmem виден только своему процессу (check --deploy об этом
+# предупреждает). Тесты получают свой кэш в памяти от core.testing.
+
+CACHE_BACKENDS = {
+    'memcached': 'django.core.cache.backends.memcached.MemcachedCache',
+    'pylibmc': 'django.core.cache.backends.memcached.PyLibMCCache',
+    # Требует пакет django-redis
+    'redis': 'django_redis.cache.RedisCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    # Таблица кэша создаётся командой createcachetable
+    'db': 'django.core.cache.backends.db.DatabaseCache',
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+}
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'file')
+CACHE_DEFAULT_LOCATIONS = {
+    'memcached': '127.0.0.1:11211',
+    'pylibmc': '127.0.0.1:11211',
+    'redis': 'redis://127.0.0.1:6379/1',
+    'file': os.path.join(BASE_DIR, 'cache'),
+    'db': 'yatube_cache',
+    'locmem': 'yatube',
+}
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION', CACHE_DEFAULT_LOCATIONS[CACHE_BACKEND]
+        ),
+        # Префикс разделяет проекты на одном сервере кэша, а версия
+        # позволяет разом сбросить все ключи при выкладке
+        'KEY_PREFIX': os.getenv('CACHE_KEY_PREFIX', 'yatube'),
+        'VERSION': int(os.getenv('CACHE_VERSION', '1')),
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', '300')),
     }
 }
+TEST_RUNNER = 'core.testing.TestRunner'